@@ -4,17 +4,32 @@ import datetime
 from django.apps import apps
 from django.conf.urls import url
 from django.contrib import admin
-from django.http import HttpResponse
-from django.template.loader import render_to_string
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
-from django.utils.html import format_html_join
+from django.utils.decorators import method_decorator
+from django.utils.html import format_html, format_html_join
 from django.utils.translation import ugettext_lazy as _
+from django.views.decorators.http import require_POST
 
-from djangocms_versioning.constants import DRAFT, PUBLISHED
-from djangocms_versioning.helpers import get_preview_url
+from djangocms_versioning.constants import DRAFT
 
-from .conf import DEFAULT_CONTENT_EXPIRY_EXPORT_DATE_FORMAT
-from .constants import CONTENT_EXPIRY_FIELDSETS
+from .conf import (
+    DEFAULT_CONTENT_EXPIRY_CHANGELIST_KEYSET_COUNT,
+    DEFAULT_CONTENT_EXPIRY_CHANGELIST_KEYSET_PAGINATION,
+    DEFAULT_CONTENT_EXPIRY_EXPORT_CHUNK_SIZE,
+    DEFAULT_CONTENT_EXPIRY_EXPORT_DATE_FORMAT,
+    DEFAULT_CONTENT_EXPIRY_EXPORT_STREAMING,
+)
+from .constants import (
+    CONTENT_EXPIRY_CHANGELIST_CURSOR_VAR,
+    CONTENT_EXPIRY_EXPORT_JOB_COMPLETED,
+    CONTENT_EXPIRY_FIELDSETS,
+)
+from .exports import create_export_job
 from .filters import (
     AuthorFilter,
     ComplianceNumberFilter,
@@ -23,14 +38,111 @@ from .filters import (
     VersionStateFilter,
 )
 from .forms import ContentExpiryForm, DefaultContentExpiryConfigurationForm
-from .helpers import get_rangefilter_expires_default
-from .models import ContentExpiry, DefaultContentExpiryConfiguration
+from .helpers import (
+    PseudoBuffer,
+    decode_keyset_cursor,
+    encode_keyset_cursor,
+    get_estimated_count,
+    get_keyset_cursor_q,
+    get_rangefilter_expires_default,
+    render_url_fragment,
+    reverse_object_url,
+)
+from .models import (
+    ContentExpiry,
+    ContentExpiryExportJob,
+    DefaultContentExpiryConfiguration,
+)
+from .utils import (
+    get_content_expiry_preview_url,
+    get_content_type_predicate,
+    get_version_content,
+    prefetch_preview_urls,
+)
+
+
+class ContentExpiryChangeList(ChangeList):
+    def __init__(self, request, *args, **kwargs):
+        self.keyset_pagination = DEFAULT_CONTENT_EXPIRY_CHANGELIST_KEYSET_PAGINATION
+        self.cursor = request.GET.get(CONTENT_EXPIRY_CHANGELIST_CURSOR_VAR) if self.keyset_pagination else None
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        # The cursor is a position in the results rather than a filter
+        lookup_params.pop(CONTENT_EXPIRY_CHANGELIST_CURSOR_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Links to other filters or orderings start from the first page again
+        remove = [*(remove or []), CONTENT_EXPIRY_CHANGELIST_CURSOR_VAR]
+        return super().get_query_string(new_params, remove)
+
+    def get_ordering(self, request, queryset):
+        if self.keyset_pagination:
+            # The cursor is a position in this ordering
+            return ["expires", "pk"]
+        return super().get_ordering(request, queryset)
+
+    def get_results(self, request):
+        if self.keyset_pagination:
+            self.get_keyset_results(request)
+        else:
+            super().get_results(request)
+        # Resolve the content objects and preview urls for the current page with a query per
+        # content type, the result list is evaluated here and reused when the rows are rendered
+        prefetch_preview_urls(self.result_list)
+
+    def get_keyset_results(self, request):
+        """
+        Get the page of results after the cursor, the page is read with a range of the
+        (expires, id) ordering so it takes the same time however deep the page is.
+        """
+        queryset = self.queryset
+        if self.cursor:
+            try:
+                queryset = queryset.filter(get_keyset_cursor_q(*decode_keyset_cursor(self.cursor)))
+            except ValueError:
+                raise IncorrectLookupParameters
+
+        # One extra record is read to find out if there is a next page
+        result_list = list(queryset[:self.list_per_page + 1])
+        has_next_page = len(result_list) > self.list_per_page
+        result_list = result_list[:self.list_per_page]
+
+        result_count = get_estimated_count(self.queryset)
+        self.result_count_is_estimated = result_count is not None
+        self.result_count_is_known = True
+        if result_count is None:
+            if DEFAULT_CONTENT_EXPIRY_CHANGELIST_KEYSET_COUNT:
+                result_count = self.queryset.count()
+            else:
+                # The count isn't shown, the admin still needs one for its action messages
+                result_count = len(result_list)
+                self.result_count_is_known = False
+
+        self.result_count = result_count
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = result_list
+        self.can_show_all = False
+        self.multi_page = has_next_page or bool(self.cursor)
+        self.paginator = None
+        self.next_cursor = None
+        if has_next_page:
+            last_result = result_list[-1]
+            self.next_cursor = encode_keyset_cursor(last_result.expires, last_result.pk)
+
+    def get_next_page_query_string(self):
+        return self.get_query_string({CONTENT_EXPIRY_CHANGELIST_CURSOR_VAR: self.next_cursor})
 
 
 @admin.register(ContentExpiry)
 class ContentExpiryAdmin(admin.ModelAdmin):
     list_display = ['title', 'content_type', 'expires', 'compliance_number', 'version_state', 'version_author']
     list_display_links = None
+    list_select_related = ('version', 'content_type', 'version_author')
     list_filter = (ComplianceNumberFilter, ContentTypeFilter, ('expires', ContentExpiryDateRangeFilter),
                    VersionStateFilter, AuthorFilter)
     form = ContentExpiryForm
@@ -55,7 +167,19 @@ class ContentExpiryAdmin(admin.ModelAdmin):
         extra_context = {'title': 'Additional Content Settings'}
         return super().change_view(request, object_id, extra_context=extra_context)
 
+    def get_changelist(self, request, **kwargs):
+        return ContentExpiryChangeList
+
     def get_queryset(self, request):
+        # The changelist, its filters and the export all read the queryset during a request,
+        # the site filters are only applied once and a copy is returned to each of them
+        queryset = getattr(request, "_content_expiry_queryset", None)
+        if queryset is None:
+            queryset = self._get_site_filtered_queryset(request)
+            request._content_expiry_queryset = queryset
+        return queryset.all()
+
+    def _get_site_filtered_queryset(self, request):
         queryset = super().get_queryset(request)
 
         # Execute any filters that need to be added before any of the admin filters
@@ -64,6 +188,13 @@ class ContentExpiryAdmin(admin.ModelAdmin):
         for content_model_filter in app_config.cms_extension.expiry_changelist_queryset_filters:
             queryset = content_model_filter(queryset, request=request)
 
+        # The predicates registered for each content model are applied in a single filter
+        predicate = get_content_type_predicate(
+            app_config.cms_extension.expiry_changelist_queryset_predicates, request
+        )
+        if predicate is not None:
+            queryset = queryset.filter(predicate)
+
         return queryset
 
     def has_add_permission(self, *args, **kwargs):
@@ -94,6 +225,11 @@ class ContentExpiryAdmin(admin.ModelAdmin):
                 self.admin_site.admin_view(self.export_to_csv),
                 name="{}_{}_export_csv".format(*info),
             ),
+            url(
+                r'^export_csv_job/$',
+                self.admin_site.admin_view(self.export_to_csv_job),
+                name="{}_{}_export_csv_job".format(*info),
+            ),
         ] + super().get_urls()
 
     def get_rangefilter_expires_default(self, *args, **kwargs):
@@ -106,14 +242,14 @@ class ContentExpiryAdmin(admin.ModelAdmin):
         """
         A field to display the content objects title
         """
-        return obj.version.content
+        return get_version_content(obj.version)
     title.short_description = _('Title')
 
     def content_type(self, obj):
         """
         A field to display the content type as a readable representation
         """
-        return obj.version.content_type
+        return obj.content_type
     content_type.short_description = _('Content type')
 
     def version_state(self, obj):
@@ -127,7 +263,7 @@ class ContentExpiryAdmin(admin.ModelAdmin):
         """
         A field to display the author of the version
         """
-        return obj.version.created_by
+        return obj.version_author
     version_author.short_description = _('Version author')
 
     def list_display_actions(self, request):
@@ -161,16 +297,7 @@ class ContentExpiryAdmin(admin.ModelAdmin):
         :param obj: this is a content expiry object
         :returns: A valid preview url to link to the content object
         """
-        content_obj = obj.version.content
-        # If the version is published, first try and get a "live" url
-        if obj.version.state == PUBLISHED:
-            if hasattr(content_obj, "get_absolute_url"):
-                return content_obj.get_absolute_url()
-        # If the content object has a preview url, get it
-        if hasattr(content_obj, "get_preview_url"):
-            return content_obj.get_preview_url()
-        # Otherwise, all else has failed, try and get a preview url
-        return get_preview_url(content_obj)
+        return get_content_expiry_preview_url(obj)
 
     def _get_preview_link(self, obj, request):
         """
@@ -182,11 +309,7 @@ class ContentExpiryAdmin(admin.ModelAdmin):
         """
         preview_url = self._get_preview_url(obj)
 
-        return render_to_string(
-            "djangocms_content_expiry/admin/icons/preview_action_icon.html", {
-                "url": preview_url,
-            }
-        )
+        return render_url_fragment("djangocms_content_expiry/admin/icons/preview_action_icon.html", preview_url)
 
     def _get_edit_link(self, obj, request):
         """
@@ -196,18 +319,14 @@ class ContentExpiryAdmin(admin.ModelAdmin):
         :param request: A request object
         :returns: An edit link to the supplied content expiry record
         """
-        archive_url = reverse(
+        archive_url = reverse_object_url(
             "admin:{app}_{model}_change".format(
                 app=obj._meta.app_label, model=self.model._meta.model_name
             ),
-            args=(obj.pk,),
+            obj.pk,
         )
 
-        return render_to_string(
-            "djangocms_content_expiry/admin/icons/edit_action_icon.html", {
-                "url": archive_url,
-            }
-        )
+        return render_url_fragment("djangocms_content_expiry/admin/icons/edit_action_icon.html", archive_url)
 
     def _format_export_datetime(self, date, date_format=DEFAULT_CONTENT_EXPIRY_EXPORT_DATE_FORMAT):
         """
@@ -221,17 +340,32 @@ class ContentExpiryAdmin(admin.ModelAdmin):
             return date.strftime(date_format)
         return ""
 
-    def export_to_csv(self, request):
+    def _iter_export_records(self, queryset):
         """
-        Retrieves the queryset and exports to csv format
+        Read the queryset from the database in chunks, resolving the content objects
+        and preview urls for each chunk with a query per content type.
+
+        :param queryset: A queryset of content expiry records
+        :returns: A generator of content expiry records
         """
-        queryset = self.get_exported_queryset(request)
-        meta = self.model._meta
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename={}.csv'.format(meta)
-        writer = csv.writer(response)
-        # Write the header to the file
-        writer.writerow([
+        chunk_size = DEFAULT_CONTENT_EXPIRY_EXPORT_CHUNK_SIZE
+        chunk = []
+        for content_expiry in queryset.iterator(chunk_size=chunk_size):
+            chunk.append(content_expiry)
+            if len(chunk) == chunk_size:
+                yield from prefetch_preview_urls(chunk)
+                chunk = []
+        yield from prefetch_preview_urls(chunk)
+
+    def _get_export_rows(self, request, queryset):
+        """
+        Build the rows of the csv export, starting with the header
+
+        :param request: A request object
+        :param queryset: A queryset of content expiry records
+        :returns: A generator of csv rows
+        """
+        yield [
             'Title',
             'Content Type',
             'Expiry Date',
@@ -239,9 +373,9 @@ class ContentExpiryAdmin(admin.ModelAdmin):
             'Version State',
             'Version Author',
             'Url'
-        ])
+        ]
 
-        for content_expiry in queryset:
+        for content_expiry in self._iter_export_records(queryset):
             content_type = self.content_type(content_expiry)
             expiry_date = self._format_export_datetime(content_expiry.expires)
             compliance_number = content_expiry.compliance_number
@@ -249,19 +383,46 @@ class ContentExpiryAdmin(admin.ModelAdmin):
             # Get an external / sharable link
             preview_url = self._get_preview_url(content_expiry)
             external_url = request.build_absolute_uri(preview_url)
-            # Write a row to the file
-            writer.writerow([
-                content_expiry.version.content,
+            yield [
+                get_version_content(content_expiry.version),
                 content_type,
                 expiry_date,
                 compliance_number,
                 version_state,
-                content_expiry.version.created_by,
+                self.version_author(content_expiry),
                 external_url,
-            ])
+            ]
+
+    def export_to_csv(self, request):
+        """
+        Retrieves the queryset and exports to csv format
+        """
+        queryset = self.get_exported_queryset(request)
+        rows = self._get_export_rows(request, queryset)
 
+        if DEFAULT_CONTENT_EXPIRY_EXPORT_STREAMING:
+            writer = csv.writer(PseudoBuffer())
+            response = StreamingHttpResponse((writer.writerow(row) for row in rows), content_type='text/csv')
+        else:
+            response = HttpResponse(content_type='text/csv')
+            writer = csv.writer(response)
+            writer.writerows(rows)
+
+        response['Content-Disposition'] = 'attachment; filename={}.csv'.format(self.model._meta)
         return response
 
+    @method_decorator(require_POST)
+    def export_to_csv_job(self, request):
+        """
+        Creates a background job that exports the current queryset to csv format,
+        the job is only created for a POST request as it changes the database
+        """
+        job = create_export_job(request)
+        self.message_user(request, _("The export has been started, it can be downloaded once it is completed"))
+        return redirect(
+            "admin:{}_{}_change".format(job._meta.app_label, job._meta.model_name), job.pk
+        )
+
     def get_exported_queryset(self, request):
         """
         Returns export queryset by respecting applied filters.
@@ -307,3 +468,69 @@ class ContentExpiryAdmin(admin.ModelAdmin):
 class DefaultContentExpiryConfigurationAdmin(admin.ModelAdmin):
     list_display = ['content_type', 'duration']
     form = DefaultContentExpiryConfigurationForm
+
+
+@admin.register(ContentExpiryExportJob)
+class ContentExpiryExportJobAdmin(admin.ModelAdmin):
+    list_display = ['created', 'created_by', 'status', 'rows_processed', 'rows_per_second', 'download_link']
+    readonly_fields = ['created', 'created_by', 'status', 'rows_processed', 'rows_per_second', 'download_link']
+    fields = readonly_fields
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request).select_related('created_by')
+        # Users can only see the exports that they have requested
+        if not request.user.is_superuser:
+            queryset = queryset.filter(created_by=request.user)
+        return queryset
+
+    def has_add_permission(self, *args, **kwargs):
+        # Entries are added from the Content Expiry changelist
+        return False
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            url(
+                r'^(?P<object_id>\d+)/download/$',
+                self.admin_site.admin_view(self.download_view),
+                name="{}_{}_download".format(*info),
+            ),
+        ] + super().get_urls()
+
+    def rows_per_second(self, obj):
+        """
+        A field to display the rate that the rows were exported at
+        """
+        return obj.rows_per_second
+    rows_per_second.short_description = _('Rows per second')
+
+    def download_link(self, obj):
+        """
+        A field to display a link to download a completed export
+        """
+        if obj.status != CONTENT_EXPIRY_EXPORT_JOB_COMPLETED:
+            return ""
+        download_url = reverse(
+            "admin:{}_{}_download".format(obj._meta.app_label, obj._meta.model_name),
+            args=(obj.pk,),
+        )
+        return format_html('<a href="{}">{}</a>', download_url, _("Download"))
+    download_link.short_description = _('Download')
+
+    def download_view(self, request, object_id):
+        """
+        Download the csv file of a completed export
+        """
+        job = get_object_or_404(self.get_queryset(request), pk=object_id)
+
+        if not self.has_view_permission(request, job):
+            raise PermissionDenied
+        if job.status != CONTENT_EXPIRY_EXPORT_JOB_COMPLETED or not job.file:
+            raise Http404
+
+        return FileResponse(
+            job.file.open('rb'),
+            as_attachment=True,
+            filename='{}.csv'.format(ContentExpiry._meta),
+            content_type='text/csv',
+        )
@@ -1,4 +1,6 @@
-from django.apps import AppConfig
+from django.apps import AppConfig, apps
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
 from django.utils.translation import ugettext_lazy as _
 
 from djangocms_versioning import signals
@@ -9,7 +11,42 @@ class DjangocmsContentExpiryConfig(AppConfig):
     verbose_name = _("django CMS Content Expiry")
 
     def ready(self):
-        from .handlers import create_content_expiry
+        from cms.models import Page, PageContent, TreeNode
+
+        from .handlers import (
+            create_content_expiry,
+            invalidate_alias_exclusion_cache,
+            invalidate_content_expiry_author_cache,
+            invalidate_default_durations,
+            invalidate_page_content_exclusion_cache,
+            invalidate_user_author_cache,
+            update_content_expiry_version_state,
+        )
+        from .models import ContentExpiry, DefaultContentExpiryConfiguration
         from .monkeypatch import admin as monkeypatch_admin  # noqa: F401
 
         signals.post_version_operation.connect(create_content_expiry)
+        signals.post_version_operation.connect(update_content_expiry_version_state)
+
+        # The default expiry durations are reloaded when the configuration changes
+        post_save.connect(invalidate_default_durations, sender=DefaultContentExpiryConfiguration)
+        post_delete.connect(invalidate_default_durations, sender=DefaultContentExpiryConfiguration)
+
+        # The changelist author filter is rebuilt when the authors or their names change
+        post_save.connect(invalidate_content_expiry_author_cache, sender=ContentExpiry)
+        post_delete.connect(invalidate_content_expiry_author_cache, sender=ContentExpiry)
+        post_save.connect(invalidate_user_author_cache, sender=get_user_model())
+        post_delete.connect(invalidate_user_author_cache, sender=get_user_model())
+
+        # The changelist PageContent site exclusion cache is rebuilt when the page tree changes
+        for model in (PageContent, Page, TreeNode):
+            post_save.connect(invalidate_page_content_exclusion_cache, sender=model)
+            post_delete.connect(invalidate_page_content_exclusion_cache, sender=model)
+
+        # The changelist alias site exclusion cache is rebuilt when an alias or its site changes
+        if apps.is_installed("djangocms_alias"):
+            from djangocms_alias.models import Alias, AliasContent
+
+            for model in (Alias, AliasContent):
+                post_save.connect(invalidate_alias_exclusion_cache, sender=model)
+                post_delete.connect(invalidate_alias_exclusion_cache, sender=model)
@@ -1,29 +1,86 @@
+import time
+from collections import Counter
+
 from django.core.cache import cache
 
 from djangocms_content_expiry.conf import (
+    DEFAULT_CONTENT_EXPIRY_CHANGELIST_ALIAS_EXCLUSION_CACHE_EXPIRY,
+    DEFAULT_CONTENT_EXPIRY_CHANGELIST_AUTHOR_CACHE_EXPIRY,
     DEFAULT_CONTENT_EXPIRY_CHANGELIST_PAGECONTENT_EXCLUSION_CACHE_EXPIRY,
 )
 from djangocms_content_expiry.constants import (
+    CONTENT_EXPIRY_CHANGELIST_ALIAS_EXCLUSION_CACHE_KEY,
+    CONTENT_EXPIRY_CHANGELIST_AUTHOR_CACHE_KEY,
     CONTENT_EXPIRY_CHANGELIST_PAGECONTENT_EXCLUSION_CACHE_KEY,
+    CONTENT_EXPIRY_DEFAULT_DURATION_CACHE_KEY,
 )
 
 
-def _get_cache_key(site_id):
-    return f"{CONTENT_EXPIRY_CHANGELIST_PAGECONTENT_EXCLUSION_CACHE_KEY}_{site_id}"
+# Changed whenever the format of the cached values changes, so entries cached
+# by an older version are not read
+EXCLUSION_CACHE_FORMAT_VERSION = 3
+
+# The exclusion cache hits and misses counted by this process
+_cache_stats = Counter()
+
+
+def _get_generation_cache_key(cache_key_prefix):
+    return f"{cache_key_prefix}_generation"
+
+
+def _get_generation(cache_key_prefix):
+    """
+    Get the current generation for a cache, the generation is part of every cache key
+    so changing it invalidates all of the existing cache entries at once.
+    """
+    generation_cache_key = _get_generation_cache_key(cache_key_prefix)
+    generation = cache.get(generation_cache_key)
+
+    if generation is None:
+        # Start from the current time so that a generation that was evicted from
+        # the cache is never reused with entries that were cached before it
+        cache.add(generation_cache_key, int(time.time() * 1000), timeout=None)
+        generation = cache.get(generation_cache_key)
+    return generation
+
+
+def _increment_generation(cache_key_prefix):
+    generation_cache_key = _get_generation_cache_key(cache_key_prefix)
+
+    try:
+        cache.incr(generation_cache_key)
+    except ValueError:
+        # The generation doesn't exist so there is nothing to invalidate
+        pass
+
+
+def _get_cache_key(cache_key_prefix, site_id):
+    generation = _get_generation(cache_key_prefix)
+    return f"{cache_key_prefix}_{EXCLUSION_CACHE_FORMAT_VERSION}_{site_id}_{generation}"
+
+
+def _set_exclusion_cache(cache_key_prefix, value, site_id, timeout):
+    cache.set(_get_cache_key(cache_key_prefix, site_id), value, timeout=timeout)
+
+
+def _get_exclusion_cache(cache_key_prefix, site_id):
+    value = cache.get(_get_cache_key(cache_key_prefix, site_id))
+    _cache_stats[(cache_key_prefix, "hits" if value is not None else "misses")] += 1
+    return value
 
 
 def set_changelist_page_content_exclusion_cache(value, site_id):
     """
-    Populate the cache that is set to never expire!
+    Populate the cache, the entry is replaced whenever the page tree changes.
 
     :param value: A value to set the cache object with
     :param site_id: The site id to get the correct cache entry
     """
-    cache_key = _get_cache_key(site_id)
-    cache.set(
-        cache_key,
+    _set_exclusion_cache(
+        CONTENT_EXPIRY_CHANGELIST_PAGECONTENT_EXCLUSION_CACHE_KEY,
         value,
-        timeout=DEFAULT_CONTENT_EXPIRY_CHANGELIST_PAGECONTENT_EXCLUSION_CACHE_EXPIRY
+        site_id,
+        timeout=DEFAULT_CONTENT_EXPIRY_CHANGELIST_PAGECONTENT_EXCLUSION_CACHE_EXPIRY,
     )
 
 
@@ -34,5 +91,114 @@ def get_changelist_page_content_exclusion_cache(site_id):
     :returns: the cache if it is set, or None if it the key doesn't exist.
     :param site_id: The site id to get the correct cache entry
     """
-    cache_key = _get_cache_key(site_id)
-    return cache.get(cache_key)
+    return _get_exclusion_cache(CONTENT_EXPIRY_CHANGELIST_PAGECONTENT_EXCLUSION_CACHE_KEY, site_id)
+
+
+def invalidate_changelist_page_content_exclusion_cache():
+    """
+    Invalidate the cached entries for every site. Every site's exclusion list contains
+    the PageContents of all of the other sites so a change on one site affects them all.
+    """
+    _increment_generation(CONTENT_EXPIRY_CHANGELIST_PAGECONTENT_EXCLUSION_CACHE_KEY)
+
+
+def set_changelist_alias_exclusion_cache(value, site_id):
+    """
+    Populate the cache, the entry is replaced whenever an Alias or AliasContent changes.
+
+    :param value: A value to set the cache object with
+    :param site_id: The site id to get the correct cache entry
+    """
+    _set_exclusion_cache(
+        CONTENT_EXPIRY_CHANGELIST_ALIAS_EXCLUSION_CACHE_KEY,
+        value,
+        site_id,
+        timeout=DEFAULT_CONTENT_EXPIRY_CHANGELIST_ALIAS_EXCLUSION_CACHE_EXPIRY,
+    )
+
+
+def get_changelist_alias_exclusion_cache(site_id):
+    """
+    Get the cached value if it exists.
+
+    :returns: the cache if it is set, or None if it the key doesn't exist.
+    :param site_id: The site id to get the correct cache entry
+    """
+    return _get_exclusion_cache(CONTENT_EXPIRY_CHANGELIST_ALIAS_EXCLUSION_CACHE_KEY, site_id)
+
+
+def invalidate_changelist_alias_exclusion_cache():
+    """
+    Invalidate the cached entries for every site.
+    """
+    _increment_generation(CONTENT_EXPIRY_CHANGELIST_ALIAS_EXCLUSION_CACHE_KEY)
+
+
+def set_changelist_author_cache(value, site_id):
+    """
+    Populate the cache, the entry is replaced whenever a Content Expiry record or a user changes.
+
+    :param value: A value to set the cache object with
+    :param site_id: The site id to get the correct cache entry
+    """
+    cache.set(
+        _get_cache_key(CONTENT_EXPIRY_CHANGELIST_AUTHOR_CACHE_KEY, site_id),
+        value,
+        timeout=DEFAULT_CONTENT_EXPIRY_CHANGELIST_AUTHOR_CACHE_EXPIRY,
+    )
+
+
+def get_changelist_author_cache(site_id):
+    """
+    Get the cached value if it exists.
+
+    :returns: the cache if it is set, or None if it the key doesn't exist.
+    :param site_id: The site id to get the correct cache entry
+    """
+    return cache.get(_get_cache_key(CONTENT_EXPIRY_CHANGELIST_AUTHOR_CACHE_KEY, site_id))
+
+
+def invalidate_changelist_author_cache():
+    """
+    Invalidate the cached entries for every site.
+    """
+    _increment_generation(CONTENT_EXPIRY_CHANGELIST_AUTHOR_CACHE_KEY)
+
+
+def get_default_duration_cache_version():
+    """
+    Get the version of the default duration configuration, shared by every process.
+
+    :returns: The version, or None if the cache is not available
+    """
+    return _get_generation(CONTENT_EXPIRY_DEFAULT_DURATION_CACHE_KEY)
+
+
+def invalidate_default_duration_cache():
+    """
+    Change the version of the default duration configuration so that every process
+    reloads its durations.
+    """
+    _increment_generation(CONTENT_EXPIRY_DEFAULT_DURATION_CACHE_KEY)
+
+
+def get_changelist_exclusion_cache_stats():
+    """
+    Get the number of exclusion cache hits and misses counted by the current process.
+
+    :returns: A dict of the hits and misses for the page content and alias caches
+    """
+    return {
+        "page_content": {
+            "hits": _cache_stats[(CONTENT_EXPIRY_CHANGELIST_PAGECONTENT_EXCLUSION_CACHE_KEY, "hits")],
+            "misses": _cache_stats[(CONTENT_EXPIRY_CHANGELIST_PAGECONTENT_EXCLUSION_CACHE_KEY, "misses")],
+        },
+        "alias": {
+            "hits": _cache_stats[(CONTENT_EXPIRY_CHANGELIST_ALIAS_EXCLUSION_CACHE_KEY, "hits")],
+            "misses": _cache_stats[(CONTENT_EXPIRY_CHANGELIST_ALIAS_EXCLUSION_CACHE_KEY, "misses")],
+        },
+    }
+
+
+def reset_changelist_exclusion_cache_stats():
+    _cache_stats.clear()
@@ -1,20 +1,27 @@
+from collections import defaultdict
+
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.shortcuts import get_current_site
 from django.core.exceptions import ImproperlyConfigured
-from django.db.models import Q
+from django.db.models import Q, prefetch_related_objects
 from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils.html import format_html
 
 from cms.app_base import CMSAppConfig, CMSAppExtension
-from cms.models import PageContent
+from cms.models import PageContent, PageUrl
 
 from .cache import (
+    get_changelist_alias_exclusion_cache,
     get_changelist_page_content_exclusion_cache,
+    set_changelist_alias_exclusion_cache,
     set_changelist_page_content_exclusion_cache,
 )
+from .conf import DEFAULT_CONTENT_EXPIRY_CHANGELIST_SITE_FILTER_SUBQUERY
 from .constants import CONTENT_EXPIRY_EXPIRE_FIELD_LABEL
+from .helpers import encode_id_ranges, get_id_ranges_q
+from .utils import get_content_expiry_preview_url, get_version_content
 
 
 try:
@@ -24,6 +31,17 @@ except ImportError:
     djangocms_alias_enabled = False
 
 
+def _get_moderation_request_content_expiry(obj):
+    """
+    Return the content expiry record of a Moderation Request tree node, the records
+    are prefetched by the Moderation Request Admin changelist queryset.
+
+    :param obj: A Moderation Request object supplied from the admin view table row
+    :return: The ContentExpiry object of the moderation request version or None
+    """
+    return getattr(obj.moderation_request.version, "contentexpiry", None)
+
+
 def get_moderation_content_expiry_link(obj):
     """
     Return a user friendly button for viewing content expiry in the
@@ -33,13 +51,13 @@ def get_moderation_content_expiry_link(obj):
     :param obj: A Moderation Request object supplied from the admin view table row
     :return: A link to the expiry record if one exists
     """
-    version = obj.moderation_request.version
+    content_expiry = _get_moderation_request_content_expiry(obj)
 
     # If a content expiry record exists we can go to it
-    if hasattr(version, "contentexpiry"):
+    if content_expiry:
         view_endpoint = format_html(
             "{}?collection__id__exact={}&_to_field=id&_popup=1",
-            reverse("admin:djangocms_content_expiry_contentexpiry_change", args=[version.contentexpiry.pk]),
+            reverse("admin:djangocms_content_expiry_contentexpiry_change", args=[content_expiry.pk]),
             obj.pk,
         )
         return render_to_string(
@@ -56,10 +74,10 @@ def get_expiry_date(obj):
     :param obj: A Moderation Request object supplied from the admin view table row
     :return: The expiry date from the matching moderation request object
     """
-    version = obj.moderation_request.version
+    content_expiry = _get_moderation_request_content_expiry(obj)
 
-    if hasattr(version, "contentexpiry"):
-        return version.contentexpiry.expires
+    if content_expiry:
+        return content_expiry.expires
 
 
 get_expiry_date.short_description = CONTENT_EXPIRY_EXPIRE_FIELD_LABEL
@@ -70,10 +88,9 @@ def get_copy_content_expiry_button(obj):
     Return a user friendly link to copy a content expiry to other Moderation Request Items
     link redirects to view which handles this
     """
-    version = obj.moderation_request.version
+    content_expiry = _get_moderation_request_content_expiry(obj)
 
-    if hasattr(version, "contentexpiry"):
-        content_expiry = version.contentexpiry
+    if content_expiry:
         view_endpoint = format_html(
             "{}?collection__id={}&moderation_request__id={}&_to_field=id&_popup=1",
             reverse("admin:djangocms_moderation_moderationrequesttreenode_copy"),
@@ -101,20 +118,34 @@ def content_expiry_site_page_content_excluded_set(queryset, request):
     """
     current_site = get_current_site(request)
     page_content_ctype = ContentType.objects.get_for_model(PageContent)
-    pagecontent_exclusion_list = get_changelist_page_content_exclusion_cache(current_site.pk)
+    pagecontent_exclusion_ranges = get_changelist_page_content_exclusion_cache(current_site.pk)
 
-    if not pagecontent_exclusion_list:
+    if pagecontent_exclusion_ranges is None:
         pagecontent_set = PageContent._original_manager.exclude(page__node__site=current_site)
-        pagecontent_set.select_related('page__node')
-
-        pagecontent_exclusion_list = pagecontent_set.values_list('id', flat=True)
-        set_changelist_page_content_exclusion_cache(pagecontent_exclusion_list, current_site.pk)
+        pagecontent_exclusion_ranges = encode_id_ranges(pagecontent_set.values_list('id', flat=True))
+        set_changelist_page_content_exclusion_cache(pagecontent_exclusion_ranges, current_site.pk)
 
     return queryset.exclude(
-        version__content_type=page_content_ctype, version__object_id__in=pagecontent_exclusion_list
+        Q(content_type=page_content_ctype) & get_id_ranges_q('object_id', pagecontent_exclusion_ranges)
     )
 
 
+def content_expiry_site_page_content_predicate(request):
+    """
+    Select the PageContent objects available on a given site. The site PageContents are
+    selected by a subquery so the database applies the filter in a single query rather
+    than excluding a list of every other sites PageContent ids.
+    Model structure: Expiry->Version->Content->Page->Node->Site
+
+    :param request: A request object if one exists
+    :return: A Q object for the ContentExpiry records of the current site PageContent models
+    """
+    current_site = get_current_site(request)
+    site_page_contents = PageContent._original_manager.filter(page__node__site=current_site)
+
+    return Q(object_id__in=site_page_contents.values('pk'))
+
+
 def _get_excluded_alias_site_list(site):
     """
     Get a list of Alias objects that cannot be viewed by the current site
@@ -123,8 +154,7 @@ def _get_excluded_alias_site_list(site):
     :return: A filtered list of alias objects
     """
     alias_exclusion_set = AliasContent._original_manager.exclude(Q(alias__site=site) | Q(alias__site__isnull=True))
-    alias_exclusion_set.select_related('alias')
-    return alias_exclusion_set.values_list('id', flat=True)
+    return list(alias_exclusion_set.values_list('id', flat=True))
 
 
 def content_expiry_site_alias_excluded_set(queryset, request):
@@ -140,22 +170,43 @@ def content_expiry_site_alias_excluded_set(queryset, request):
     """
     current_site = get_current_site(request)
     alias_content_ctype = ContentType.objects.get_for_model(AliasContent)
-    alias_exclusion_set = _get_excluded_alias_site_list(current_site)
+    alias_exclusion_ranges = get_changelist_alias_exclusion_cache(current_site.pk)
+
+    if alias_exclusion_ranges is None:
+        alias_exclusion_ranges = encode_id_ranges(_get_excluded_alias_site_list(current_site))
+        set_changelist_alias_exclusion_cache(alias_exclusion_ranges, current_site.pk)
 
     return queryset.exclude(
-      version__content_type=alias_content_ctype, version__object_id__in=alias_exclusion_set
+        Q(content_type=alias_content_ctype) & get_id_ranges_q('object_id', alias_exclusion_ranges)
     )
 
 
+def content_expiry_site_alias_predicate(request):
+    """
+    Select the Alias objects available on a given site. The site Aliases are selected by a
+    subquery so the database applies the filter in a single query rather than excluding
+    a list of every other sites AliasContent ids.
+    Model structure: Expiry->Version->Content->Alias->site
+
+    :param request: A request object if one exists
+    :return: A Q object for the ContentExpiry records of the current site AliasContent models
+    """
+    current_site = get_current_site(request)
+    site_alias_contents = AliasContent._original_manager.filter(
+        Q(alias__site=current_site) | Q(alias__site__isnull=True)
+    )
+
+    return Q(object_id__in=site_alias_contents.values('pk'))
+
+
 def get_copy_compliance_number_button(obj):
     """
     Return a user friendly link to copy a content expiry compliance number to other Moderation Request Items
     link redirects to view which handles this
     """
-    version = obj.moderation_request.version
+    content_expiry = _get_moderation_request_content_expiry(obj)
 
-    if hasattr(version, "contentexpiry"):
-        content_expiry = version.contentexpiry
+    if content_expiry:
         view_endpoint = format_html(
             "{}?collection__id={}&moderation_request__id={}&_to_field=id&_popup=1&copy=compliance",
             reverse("admin:djangocms_moderation_moderationrequesttreenode_copy"),
@@ -172,15 +223,49 @@ def get_copy_compliance_number_button(obj):
     return ""
 
 
+def get_page_content_preview_urls(content_expiry_list):
+    """
+    Resolve the preview urls of PageContent objects, the pages, tree nodes and page urls of
+    every PageContent are read with a query each rather than with queries for every PageContent.
+
+    :param content_expiry_list: A list of ContentExpiry objects for PageContent versions
+    :return: A list of the preview urls of the ContentExpiry objects supplied
+    """
+    page_contents = [get_version_content(content_expiry.version) for content_expiry in content_expiry_list]
+    prefetch_related_objects(page_contents, "page__node")
+
+    page_urls = defaultdict(dict)
+    for page_url in PageUrl.objects.filter(page__in={page_content.page_id for page_content in page_contents}):
+        page_urls[page_url.page_id][page_url.language] = page_url
+
+    # Fill the url cache the page reads its path from, including the
+    # fallback languages without a url so that they are not queried either
+    for page_content in page_contents:
+        page = page_content.page
+        page.urls_cache = dict(page_urls[page.pk])
+        for language in [page_content.language, *page.get_fallbacks(page_content.language)]:
+            page.urls_cache.setdefault(language, None)
+
+    return [get_content_expiry_preview_url(content_expiry) for content_expiry in content_expiry_list]
+
+
 class ContentExpiryExtension(CMSAppExtension):
     def __init__(self):
+        # The changelist queryset filters and predicates must only depend on the current site of the
+        # request, the author filter options built from the filtered queryset are cached for each site
         self.expiry_changelist_queryset_filters = []
+        self.expiry_preview_url_resolvers = {}
+        self.expiry_changelist_queryset_predicates = {}
 
     def configure_app(self, cms_config):
         versioning_enabled = getattr(cms_config, "djangocms_versioning_enabled", False)
         moderation_enabled = getattr(cms_config, "djangocms_moderation_enabled", False)
         expiry_changelist_queryset_filters = getattr(
             cms_config, "djangocms_content_expiry_changelist_queryset_filters", [])
+        expiry_preview_url_resolvers = getattr(
+            cms_config, "djangocms_content_expiry_preview_url_resolvers", {})
+        expiry_changelist_queryset_predicates = getattr(
+            cms_config, "djangocms_content_expiry_changelist_queryset_predicates", {})
 
         if not versioning_enabled:
             raise ImproperlyConfigured("Versioning needs to be enabled for Content Expiry")
@@ -189,6 +274,8 @@ class ContentExpiryExtension(CMSAppExtension):
             raise ImproperlyConfigured("Moderation needs to be enabled for Content Expiry")
 
         self.expiry_changelist_queryset_filters.extend(expiry_changelist_queryset_filters)
+        self.expiry_preview_url_resolvers.update(expiry_preview_url_resolvers)
+        self.expiry_changelist_queryset_predicates.update(expiry_changelist_queryset_predicates)
 
 
 class ContentExpiryAppConfig(CMSAppConfig):
@@ -210,11 +297,24 @@ class ContentExpiryAppConfig(CMSAppConfig):
     djangocms_content_expiry_enabled = getattr(
         settings, "DJANGOCMS_CONTENT_EXPIRY_ENABLED", True
     )
-    djangocms_content_expiry_changelist_queryset_filters = [
-        content_expiry_site_page_content_excluded_set,
-    ]
-
-    if djangocms_alias_enabled:
-        djangocms_content_expiry_changelist_queryset_filters.append(
-            content_expiry_site_alias_excluded_set
-        )
+    if DEFAULT_CONTENT_EXPIRY_CHANGELIST_SITE_FILTER_SUBQUERY:
+        djangocms_content_expiry_changelist_queryset_predicates = {
+            PageContent: content_expiry_site_page_content_predicate,
+        }
+
+        if djangocms_alias_enabled:
+            djangocms_content_expiry_changelist_queryset_predicates[AliasContent] = (
+                content_expiry_site_alias_predicate
+            )
+    else:
+        djangocms_content_expiry_changelist_queryset_filters = [
+            content_expiry_site_page_content_excluded_set,
+        ]
+
+        if djangocms_alias_enabled:
+            djangocms_content_expiry_changelist_queryset_filters.append(
+                content_expiry_site_alias_excluded_set
+            )
+    djangocms_content_expiry_preview_url_resolvers = {
+        PageContent: get_page_content_preview_urls,
+    }
@@ -16,7 +16,72 @@ DEFAULT_CONTENT_EXPIRY_EXPORT_DATE_FORMAT = getattr(
     settings, "CMS_CONTENT_EXPIRY_DEFAULT_CONTENT_EXPIRY_EXPORT_DATE_FORMAT", "%Y/%m/%d %H:%M %z"
 )
 
-# Default Content Expiry changelist page content exclusion cache expiration duration in seconds
+# Stream the csv export to the client rather than building the whole file in memory
+DEFAULT_CONTENT_EXPIRY_EXPORT_STREAMING = getattr(
+    settings, "CMS_CONTENT_EXPIRY_DEFAULT_CONTENT_EXPIRY_EXPORT_STREAMING", False
+)
+
+# The number of Content Expiry records read from the database at a time by the csv export
+DEFAULT_CONTENT_EXPIRY_EXPORT_CHUNK_SIZE = getattr(
+    settings, "CMS_CONTENT_EXPIRY_DEFAULT_CONTENT_EXPIRY_EXPORT_CHUNK_SIZE", 500
+)
+
+# How background csv export jobs are run: "thread" runs the jobs in a thread pool in the web process,
+# "command" leaves the jobs for the run_content_expiry_export_jobs management command
+DEFAULT_CONTENT_EXPIRY_EXPORT_JOB_RUNNER = getattr(
+    settings, "CMS_CONTENT_EXPIRY_DEFAULT_CONTENT_EXPIRY_EXPORT_JOB_RUNNER", "thread"
+)
+
+# The number of background csv export jobs that can run at the same time in the thread pool
+DEFAULT_CONTENT_EXPIRY_EXPORT_JOB_WORKERS = getattr(
+    settings, "CMS_CONTENT_EXPIRY_DEFAULT_CONTENT_EXPIRY_EXPORT_JOB_WORKERS", 1
+)
+
+# The number of seconds after which a background csv export job that is still running is treated as
+# abandoned, for example when its process was stopped, and is queued to be run again by the
+# run_content_expiry_export_jobs management command
+DEFAULT_CONTENT_EXPIRY_EXPORT_JOB_STALE_TIMEOUT = getattr(
+    settings, "CMS_CONTENT_EXPIRY_DEFAULT_CONTENT_EXPIRY_EXPORT_JOB_STALE_TIMEOUT", 60 * 60
+)
+
+# Default Content Expiry changelist page content exclusion cache expiration duration in seconds,
+# the cache is also invalidated whenever the page tree changes
 DEFAULT_CONTENT_EXPIRY_CHANGELIST_PAGECONTENT_EXCLUSION_CACHE_EXPIRY = getattr(
-    settings, "CMS_DEFAULT_CONTENT_EXPIRY_CHANGELIST_PAGECONTENT_EXCLUSION_CACHE_EXPIRY", 300
+    settings, "CMS_DEFAULT_CONTENT_EXPIRY_CHANGELIST_PAGECONTENT_EXCLUSION_CACHE_EXPIRY", 60 * 60 * 24
+)
+
+# Default Content Expiry changelist alias content exclusion cache expiration duration in seconds,
+# the cache is also invalidated whenever an Alias or AliasContent changes
+DEFAULT_CONTENT_EXPIRY_CHANGELIST_ALIAS_EXCLUSION_CACHE_EXPIRY = getattr(
+    settings, "CMS_DEFAULT_CONTENT_EXPIRY_CHANGELIST_ALIAS_EXCLUSION_CACHE_EXPIRY", 60 * 60 * 24
+)
+
+# Default Content Expiry changelist author filter cache expiration duration in seconds,
+# the cache is also invalidated when a Content Expiry record is created or deleted or a user's name changes
+DEFAULT_CONTENT_EXPIRY_CHANGELIST_AUTHOR_CACHE_EXPIRY = getattr(
+    settings, "CMS_DEFAULT_CONTENT_EXPIRY_CHANGELIST_AUTHOR_CACHE_EXPIRY", 60 * 60 * 24
+)
+
+# Page through the Content Expiry changelist with (expires, id) cursors rather than page numbers,
+# the number of records is estimated on PostgreSQL rather than counted
+DEFAULT_CONTENT_EXPIRY_CHANGELIST_KEYSET_PAGINATION = getattr(
+    settings, "CMS_CONTENT_EXPIRY_DEFAULT_CONTENT_EXPIRY_CHANGELIST_KEYSET_PAGINATION", False
+)
+
+# Count the records of the Content Expiry changelist when it is paged with cursors and the number
+# of records can't be estimated, otherwise the count is not shown
+DEFAULT_CONTENT_EXPIRY_CHANGELIST_KEYSET_COUNT = getattr(
+    settings, "CMS_CONTENT_EXPIRY_DEFAULT_CONTENT_EXPIRY_CHANGELIST_KEYSET_COUNT", True
+)
+
+# Filter the Content Expiry changelist by site using a subquery in the database rather than
+# excluding a list of the content ids from other sites
+DEFAULT_CONTENT_EXPIRY_CHANGELIST_SITE_FILTER_SUBQUERY = getattr(
+    settings, "CMS_CONTENT_EXPIRY_DEFAULT_CONTENT_EXPIRY_CHANGELIST_SITE_FILTER_SUBQUERY", False
+)
+
+# Create the Content Expiry record for a new draft once the transaction that created it has been
+# committed, the records for every draft created in a transaction are then created together
+DEFAULT_CONTENT_EXPIRY_DEFERRED_CREATION = getattr(
+    settings, "CMS_CONTENT_EXPIRY_DEFAULT_CONTENT_EXPIRY_DEFERRED_CREATION", False
 )
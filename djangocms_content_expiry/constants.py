@@ -5,4 +5,27 @@ CONTENT_EXPIRY_EXPIRE_FIELD_LABEL = _("expiry date")
 CONTENT_EXPIRY_COMPLIANCE_FIELD_LABEL = _("compliance number")
 
 CONTENT_EXPIRY_CHANGELIST_PAGECONTENT_EXCLUSION_CACHE_KEY = "djangocms_content_expiry_changelist_pagecontent_exclusion"
+CONTENT_EXPIRY_CHANGELIST_ALIAS_EXCLUSION_CACHE_KEY = "djangocms_content_expiry_changelist_alias_exclusion"
+CONTENT_EXPIRY_DEFAULT_DURATION_CACHE_KEY = "djangocms_content_expiry_default_duration"
+CONTENT_EXPIRY_CHANGELIST_AUTHOR_CACHE_KEY = "djangocms_content_expiry_changelist_author"
+# The changelist query string parameter holding the keyset pagination cursor
+CONTENT_EXPIRY_CHANGELIST_CURSOR_VAR = "cursor"
 CONTENT_EXPIRY_FIELDSETS = ['compliance_number', 'created_by', 'version', 'expires']
+# The fields of a Content Expiry record that are copied from its version
+CONTENT_EXPIRY_VERSION_FIELDS = {
+    'version', 'version_id', 'content_type', 'content_type_id', 'object_id', 'state',
+    'version_author', 'version_author_id',
+}
+
+CONTENT_EXPIRY_EXPORT_JOB_PENDING = "pending"
+CONTENT_EXPIRY_EXPORT_JOB_RUNNING = "running"
+CONTENT_EXPIRY_EXPORT_JOB_COMPLETED = "completed"
+CONTENT_EXPIRY_EXPORT_JOB_FAILED = "failed"
+CONTENT_EXPIRY_EXPORT_JOB_STATUSES = (
+    (CONTENT_EXPIRY_EXPORT_JOB_PENDING, _("Pending")),
+    (CONTENT_EXPIRY_EXPORT_JOB_RUNNING, _("Running")),
+    (CONTENT_EXPIRY_EXPORT_JOB_COMPLETED, _("Completed")),
+    (CONTENT_EXPIRY_EXPORT_JOB_FAILED, _("Failed")),
+)
+CONTENT_EXPIRY_EXPORT_JOB_RUNNER_THREAD = "thread"
+CONTENT_EXPIRY_EXPORT_JOB_RUNNER_COMMAND = "command"
@@ -0,0 +1,163 @@
+import csv
+import datetime
+import io
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.contrib import admin
+from django.core.files import File
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connection, transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from .conf import (
+    DEFAULT_CONTENT_EXPIRY_EXPORT_CHUNK_SIZE,
+    DEFAULT_CONTENT_EXPIRY_EXPORT_JOB_RUNNER,
+    DEFAULT_CONTENT_EXPIRY_EXPORT_JOB_STALE_TIMEOUT,
+    DEFAULT_CONTENT_EXPIRY_EXPORT_JOB_WORKERS,
+)
+from .constants import (
+    CONTENT_EXPIRY_EXPORT_JOB_COMPLETED,
+    CONTENT_EXPIRY_EXPORT_JOB_FAILED,
+    CONTENT_EXPIRY_EXPORT_JOB_PENDING,
+    CONTENT_EXPIRY_EXPORT_JOB_RUNNER_THREAD,
+    CONTENT_EXPIRY_EXPORT_JOB_RUNNING,
+)
+from .models import ContentExpiry, ContentExpiryExportJob
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=DEFAULT_CONTENT_EXPIRY_EXPORT_JOB_WORKERS,
+            thread_name_prefix="djangocms_content_expiry_export",
+        )
+    return _executor
+
+
+def _run_export_job_in_thread(job_id):
+    """
+    Run an export job in a thread pool worker, each worker thread uses its own
+    database connection which is closed once the job is finished. The future of
+    the job is never read so an error is logged rather than raised.
+    """
+    try:
+        run_export_job(ContentExpiryExportJob.objects.get(pk=job_id))
+    except Exception:
+        logger.exception("Content expiry export job %s failed", job_id)
+    finally:
+        connection.close()
+
+
+def create_export_job(request):
+    """
+    Create an export job for the Content Expiry changelist filters in a request
+    and queue it to be run.
+
+    :param request: A request object for the Content Expiry changelist export
+    :returns: The export job created
+    """
+    job = ContentExpiryExportJob.objects.create(
+        created_by=request.user,
+        query_string=request.GET.urlencode(),
+        base_url=request.build_absolute_uri("/"),
+    )
+
+    # Otherwise the job is left for the run_content_expiry_export_jobs command
+    if DEFAULT_CONTENT_EXPIRY_EXPORT_JOB_RUNNER == CONTENT_EXPIRY_EXPORT_JOB_RUNNER_THREAD:
+        transaction.on_commit(lambda: _get_executor().submit(_run_export_job_in_thread, job.pk))
+
+    return job
+
+
+def requeue_stale_export_jobs():
+    """
+    Queue the export jobs that have been running for longer than the stale timeout
+    to be run again, such a job was abandoned when the process running it stopped.
+
+    :returns: The number of export jobs queued again
+    """
+    stale_started = timezone.now() - datetime.timedelta(seconds=DEFAULT_CONTENT_EXPIRY_EXPORT_JOB_STALE_TIMEOUT)
+    return ContentExpiryExportJob.objects.filter(
+        status=CONTENT_EXPIRY_EXPORT_JOB_RUNNING,
+        started__lt=stale_started,
+    ).update(status=CONTENT_EXPIRY_EXPORT_JOB_PENDING, started=None, rows_processed=0)
+
+
+def _build_export_request(job):
+    """
+    Rebuild a changelist request for the filters captured by an export job
+    """
+    base_url = urlsplit(job.base_url)
+    path = reverse("admin:{}_{}_export_csv".format(
+        ContentExpiry._meta.app_label, ContentExpiry._meta.model_name
+    ))
+    request = WSGIRequest({
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": job.query_string,
+        "HTTP_HOST": base_url.netloc,
+        "SERVER_NAME": base_url.hostname,
+        "SERVER_PORT": str(base_url.port or (443 if base_url.scheme == "https" else 80)),
+        "wsgi.url_scheme": base_url.scheme,
+        "wsgi.input": io.BytesIO(),
+    })
+    request.user = job.created_by
+    return request
+
+
+def run_export_job(job):
+    """
+    Export the Content Expiry records for the filters captured by an export job
+    to a csv file in the default storage, recording the progress on the job.
+
+    :param job: A ContentExpiryExportJob object
+    """
+    model_admin = admin.site._registry[ContentExpiry]
+    job_queryset = ContentExpiryExportJob.objects.filter(pk=job.pk)
+
+    job.status = CONTENT_EXPIRY_EXPORT_JOB_RUNNING
+    job.started = timezone.now()
+    job.rows_processed = 0
+    job.save(update_fields=["status", "started", "rows_processed"])
+
+    try:
+        request = _build_export_request(job)
+        queryset = model_admin.get_exported_queryset(request)
+        rows = model_admin._get_export_rows(request, queryset)
+
+        with tempfile.TemporaryFile() as export_file:
+            text_file = io.TextIOWrapper(export_file, encoding="utf-8", newline="")
+            writer = csv.writer(text_file)
+            # The header
+            writer.writerow(next(rows))
+
+            for row in rows:
+                writer.writerow(row)
+                job.rows_processed += 1
+                if job.rows_processed % DEFAULT_CONTENT_EXPIRY_EXPORT_CHUNK_SIZE == 0:
+                    job_queryset.update(rows_processed=job.rows_processed)
+
+            text_file.flush()
+            export_file.seek(0)
+            job.file.save(f"{ContentExpiry._meta}_{job.pk}.csv", File(export_file), save=False)
+            text_file.detach()
+    except Exception:
+        job.status = CONTENT_EXPIRY_EXPORT_JOB_FAILED
+        job.finished = timezone.now()
+        job.save(update_fields=["status", "finished", "rows_processed"])
+        raise
+
+    job.status = CONTENT_EXPIRY_EXPORT_JOB_COMPLETED
+    job.finished = timezone.now()
+    job.save(update_fields=["status", "finished", "rows_processed", "file"])
@@ -1,10 +1,13 @@
 from django.contrib import admin
 from django.contrib.auth import get_user_model
+from django.contrib.sites.shortcuts import get_current_site
+from django.utils.encoding import force_text
 from django.utils.translation import ugettext_lazy as _
 
 from djangocms_versioning.constants import PUBLISHED, VERSION_STATES
 from rangefilter.filters import DateRangeFilter
 
+from .cache import get_changelist_author_cache, set_changelist_author_cache
 from .helpers import get_rangefilter_expires_default
 from .utils import get_versionable_content_types
 
@@ -33,20 +36,15 @@ class ContentTypeFilter(SimpleListMultiselectFilter):
     template = 'djangocms_content_expiry/multiselect_filter.html'
 
     def lookups(self, request, model_admin):
-        lookup_list = []
-        for content_type in get_versionable_content_types():
-            lookup_list_entry = (content_type.pk, content_type)
-            # Only add unique entries
-            if lookup_list_entry not in lookup_list:
-                lookup_list.append(lookup_list_entry)
-        return lookup_list
+        # The versionable content types are unique
+        return [(content_type.pk, content_type) for content_type in get_versionable_content_types()]
 
     def queryset(self, request, queryset):
         content_types = self.value()
         if not content_types:
             return queryset
 
-        return queryset.filter(version__content_type__in=content_types.split(','))
+        return queryset.filter(content_type__in=content_types.split(','))
 
     def choices(self, changelist):
         yield {
@@ -124,12 +122,12 @@ class VersionStateFilter(SimpleListMultiselectFilter):
         # Default setting in use
         if self.default_filter_value:
             if not state:
-                return queryset.filter(version__state=self.default_filter_value)
+                return queryset.filter(state=self.default_filter_value)
             elif state != "_all_":
-                return queryset.filter(version__state__in=state.split(','))
+                return queryset.filter(state__in=state.split(','))
         # Default setting not in use
         elif not self.default_filter_value and state:
-            return queryset.filter(version__state__in=state.split(','))
+            return queryset.filter(state__in=state.split(','))
         return queryset
 
     def choices(self, changelist):
@@ -160,22 +158,28 @@ class AuthorFilter(admin.SimpleListFilter):
     parameter_name = "created_by"
 
     def lookups(self, request, model_admin):
-        from django.utils.encoding import force_text
-        User = get_user_model()
-        options = []
-        qs = model_admin.get_queryset(request)
-        authors = qs.values_list('version__created_by', flat=True).distinct()
-        users = User.objects.filter(pk__in=authors)
-
-        for user in users:
-            options.append(
-                (force_text(user.pk), user.get_full_name() or user.get_username())
-            )
+        # The authors are cached for each site as the changelist is filtered by site, the
+        # queryset filters and predicates registered in cms_config must only depend on the site
+        site_id = get_current_site(request).pk
+        options = get_changelist_author_cache(site_id)
+
+        if options is None:
+            User = get_user_model()
+            options = []
+            qs = model_admin.get_queryset(request)
+            authors = qs.order_by().values_list('version_author', flat=True).distinct()
+            users = User.objects.filter(pk__in=authors)
+
+            for user in users:
+                options.append(
+                    (force_text(user.pk), user.get_full_name() or user.get_username())
+                )
+            set_changelist_author_cache(options, site_id)
         return options
 
     def queryset(self, request, queryset):
         if self.value():
-            return queryset.filter(created_by=self.value()).distinct()
+            return queryset.filter(version_author=self.value())
         return queryset
 
 
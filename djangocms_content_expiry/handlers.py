@@ -1,13 +1,144 @@
+import threading
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
 from djangocms_versioning import constants
+from djangocms_versioning.models import Version
 
 from djangocms_content_expiry.models import ContentExpiry
 
-from .utils import get_future_expire_date
+from .cache import (
+    invalidate_changelist_alias_exclusion_cache,
+    invalidate_changelist_author_cache,
+    invalidate_changelist_page_content_exclusion_cache,
+    invalidate_default_duration_cache,
+)
+from .conf import DEFAULT_CONTENT_EXPIRY_DEFERRED_CREATION
+from .utils import get_future_expire_date, get_future_expire_dates
+
+
+# The versions collected by the active batch_content_expiry in each thread
+_batch = threading.local()
+
+
+def create_content_expiry_records(versions):
+    """
+    Create the content expiry records for many draft versions at once. The records of
+    the source versions are found with a single query and the records are inserted with
+    a single bulk_create.
+
+    :param versions: An iterable of draft versions that need a content expiry record
+    """
+    # Read the versions again, they may have changed or been removed since they were collected
+    versions = list(
+        Version.objects.filter(
+            pk__in=[version.pk for version in versions], contentexpiry__isnull=True
+        ).order_by("pk")
+    )
+    # Attempt to find an existing content expiry record from a linked version
+    source_expiry_dates = dict(
+        ContentExpiry.objects.filter(
+            version_id__in={version.source_id for version in versions if version.source_id}
+        ).values_list("version_id", "expires")
+    )
+    future_expiry_dates = get_future_expire_dates((version, version.created) for version in versions)
+    expiry_records = []
+
+    for version, future_expiry_date in zip(versions, future_expiry_dates):
+        expiry_date = source_expiry_dates.get(version.source_id, future_expiry_date)
+        # A source version can be in the same batch
+        source_expiry_dates[version.pk] = expiry_date
+
+        expiry = ContentExpiry(
+            version=version,
+            created=version.created,
+            created_by_id=version.created_by_id,
+            expires=expiry_date,
+        )
+        # bulk_create doesn't call save so the version fields are copied here
+        expiry.update_version_fields()
+        expiry_records.append(expiry)
+
+    ContentExpiry.objects.bulk_create(expiry_records)
+    # bulk_create doesn't send the signals that keep the author filter up to date
+    transaction.on_commit(invalidate_changelist_author_cache)
+
+
+def _flush_deferred_content_expiry():
+    """
+    Create the content expiry records for the versions collected on the connection, the
+    first callback of a transaction creates them all and any later callbacks do nothing
+    """
+    connection = transaction.get_connection()
+    versions = getattr(connection, "content_expiry_deferred_versions", None)
+    connection.content_expiry_deferred_versions = None
+    if versions:
+        create_content_expiry_records(versions)
+
+
+def _defer_content_expiry(version):
+    """
+    Collect a version to have its content expiry record created once the current
+    transaction is committed, every version collected in a transaction is created together.
+    """
+    connection = transaction.get_connection()
+    # Outside of a transaction there is nothing to wait for
+    if not connection.in_atomic_block:
+        connection.content_expiry_deferred_versions = None
+        create_content_expiry_records([version])
+        return
+
+    versions = getattr(connection, "content_expiry_deferred_versions", None)
+    if versions is None or transaction.get_rollback():
+        versions = connection.content_expiry_deferred_versions = []
+    versions.append(version)
+    # A callback is registered for each version as the callbacks registered in a savepoint
+    # are discarded when it is rolled back. The versions of a rolled back savepoint are
+    # left in the list, they are not found when the records are created.
+    transaction.on_commit(_flush_deferred_content_expiry)
+
+
+@contextmanager
+def batch_content_expiry():
+    """
+    Collect the drafts created while the context is active and create their content
+    expiry records together when it exits, rather than one at a time as each draft is
+    created. Nothing is created if the context exits with an exception.
+
+        with batch_content_expiry():
+            for content in contents:
+                Version.objects.create(content=content, created_by=user)
+    """
+    # A nested batch is created by the outermost batch
+    if getattr(_batch, "versions", None) is not None:
+        yield
+        return
+
+    _batch.versions = versions = []
+    try:
+        yield
+    finally:
+        _batch.versions = None
+
+    if versions:
+        create_content_expiry_records(versions)
 
 
 def create_content_expiry(**kwargs):
     if kwargs['operation'] == constants.OPERATION_DRAFT:
         version = kwargs["obj"]
+
+        batch_versions = getattr(_batch, "versions", None)
+        if batch_versions is not None:
+            batch_versions.append(version)
+            return
+
+        if DEFAULT_CONTENT_EXPIRY_DEFERRED_CREATION:
+            _defer_content_expiry(version)
+            return
+
         # Attempt to find an existing content expiry record from a linked version
         expire_record = ContentExpiry.objects.filter(version_id=version.source_id)
         if not expire_record:
@@ -21,3 +152,58 @@ def create_content_expiry(**kwargs):
             created_by=version.created_by,
             expires=expiry_date,
         )
+
+
+def update_content_expiry_version_state(**kwargs):
+    """
+    Keep the version state stored on the content expiry record in sync with the version
+    """
+    if kwargs['operation'] != constants.OPERATION_DRAFT:
+        version = kwargs["obj"]
+        ContentExpiry.objects.filter(version=version).update(state=version.state)
+
+
+def invalidate_page_content_exclusion_cache(**kwargs):
+    """
+    Invalidate the changelist PageContent site exclusion cache whenever the page tree changes,
+    once the change is committed so that the old page tree can't be cached under the new generation
+    """
+    transaction.on_commit(invalidate_changelist_page_content_exclusion_cache)
+
+
+def invalidate_alias_exclusion_cache(**kwargs):
+    """
+    Invalidate the changelist alias site exclusion cache whenever an Alias or AliasContent changes,
+    once the change is committed so that the old aliases can't be cached under the new generation
+    """
+    transaction.on_commit(invalidate_changelist_alias_exclusion_cache)
+
+
+def invalidate_content_expiry_author_cache(created=None, **kwargs):
+    """
+    Invalidate the changelist author filter cache once a Content Expiry record is created or
+    deleted, the author of an existing record doesn't change
+    """
+    # A deleted record has no created argument
+    if created is not False:
+        transaction.on_commit(invalidate_changelist_author_cache)
+
+
+def invalidate_user_author_cache(instance, created=False, update_fields=None, **kwargs):
+    """
+    Invalidate the changelist author filter cache once the name of a user changes, a new
+    user isn't an author yet and saves such as a login update don't change the name
+    """
+    User = get_user_model()
+    name_fields = {"first_name", "last_name", User.USERNAME_FIELD}
+    if created or (update_fields is not None and not name_fields.intersection(update_fields)):
+        return
+    transaction.on_commit(invalidate_changelist_author_cache)
+
+
+def invalidate_default_durations(**kwargs):
+    """
+    Reload the default expiry durations in every process whenever the configuration changes,
+    once the change is committed so that no process reloads the old configuration
+    """
+    transaction.on_commit(invalidate_default_duration_cache)
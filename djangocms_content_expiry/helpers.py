@@ -1,8 +1,39 @@
+import json
+import operator
+from array import array
 from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import accumulate, chain, repeat
+
+from django.db import connections
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.urls import get_script_prefix, get_urlconf, reverse
+from django.utils.dateparse import parse_datetime
+from django.utils.html import conditional_escape
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
 
 from djangocms_content_expiry.conf import DEFAULT_RANGEFILTER_DELTA
 
 
+# The most id ranges expanded into range lookups by get_id_ranges_q, any other
+# ranges are added to the IN lookup so the size of the query stays bounded
+MAX_ID_RANGE_LOOKUPS = 100
+
+# The encodings of the ids cached by encode_id_ranges, as ranges of consecutive ids
+# or as the gaps between the sorted ids
+ID_RANGES = "ranges"
+ID_DELTAS = "deltas"
+
+# Replaced by the real value in the fragments and urls rendered once by each process
+FRAGMENT_PLACEHOLDER = "djangocms-content-expiry-placeholder"
+
+# The most url fragments and reversed urls kept by each process, there is one for
+# each template or url name, language, url configuration and script prefix used
+MAX_CACHED_URLS = 256
+
+
 def get_rangefilter_expires_default():
     """
     Sets a default date range to help filter
@@ -11,3 +42,206 @@ def get_rangefilter_expires_default():
     start_date = datetime.now()
     end_date = datetime.now() + timedelta(DEFAULT_RANGEFILTER_DELTA)
     return start_date, end_date
+
+
+class PseudoBuffer:
+    """
+    A file like object that returns the value written rather than storing it,
+    allows a csv writer to produce rows for a streaming response
+    """
+    def write(self, value):
+        return value
+
+
+def _get_array_typecode(max_value):
+    """
+    :returns: The smallest unsigned integer array typecode that can store the value
+    """
+    for typecode in ("B", "H", "I"):
+        if max_value < 1 << (8 * array(typecode).itemsize):
+            return typecode
+    return "Q"
+
+
+def encode_id_ranges(ids):
+    """
+    Encode a collection of ids to be cached. Consecutive ids are stored as sorted,
+    merged and inclusive ranges of start, end pairs so the array is much smaller to
+    cache than the list of ids. Ids that are mostly not consecutive, such as the ids
+    of sites whose pages were created in turn, don't make fewer ranges so the gaps
+    between the sorted ids are stored instead when that is smaller.
+
+    :param ids: An iterable of positive integer ids
+    :returns: A tuple of the encoding, ID_RANGES or ID_DELTAS, and an array of unsigned integers
+    """
+    ids = sorted(set(ids))
+    ranges = array(_get_array_typecode(ids[-1] if ids else 0))
+
+    for id_ in ids:
+        if ranges and id_ == ranges[-1] + 1:
+            ranges[-1] = id_
+        else:
+            ranges.extend((id_, id_))
+
+    # The first id is stored as its gap from 0
+    deltas = list(map(operator.sub, ids, [0] + ids[:-1]))
+    deltas = array(_get_array_typecode(max(deltas, default=0)), deltas)
+
+    if deltas.itemsize * len(deltas) < ranges.itemsize * len(ranges):
+        return ID_DELTAS, deltas
+    return ID_RANGES, ranges
+
+
+def decode_id_ranges(encoded_ids):
+    """
+    :param encoded_ids: The ids encoded by encode_id_ranges
+    :returns: An iterator of the inclusive start, end tuples of the ranges
+    """
+    encoding, values = encoded_ids
+    if encoding == ID_RANGES:
+        return zip(values[::2], values[1::2])
+
+    ranges = []
+    for id_ in accumulate(values):
+        if ranges and id_ == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], id_)
+        else:
+            ranges.append((id_, id_))
+    return iter(ranges)
+
+
+def get_id_ranges_q(field_name, encoded_ids):
+    """
+    Expand encoded ids into a lookup for the field. The longest ranges use range
+    lookups and the ids of the rest are combined into a single IN lookup.
+
+    :param field_name: The name of the field that contains the ids
+    :param encoded_ids: The ids encoded by encode_id_ranges
+    :returns: A Q object matching the ids
+    """
+    encoding, values = encoded_ids
+    # The gaps are stored when there are too few consecutive ids to make ranges of
+    if encoding == ID_DELTAS:
+        return Q((f"{field_name}__in", list(accumulate(values))))
+
+    starts, ends = list(values[::2]), list(values[1::2])
+    lengths = list(map(operator.sub, ends, starts))
+    # A range of two ids uses as many query parameters as listing the ids
+    range_lookup_indexes = [
+        index
+        for index in sorted(range(len(lengths)), key=lengths.__getitem__, reverse=True)[:MAX_ID_RANGE_LOOKUPS]
+        if lengths[index] > 1
+    ]
+    range_lookups = sorted((starts[index], ends[index]) for index in range_lookup_indexes)
+    # Empty the ranges that have a range lookup and list the ids of the rest
+    for index in range_lookup_indexes:
+        starts[index], ends[index] = 1, 0
+    ids = list(chain.from_iterable(map(range, starts, map(operator.add, ends, repeat(1)))))
+
+    return Q(
+        (f"{field_name}__in", ids),
+        *((f"{field_name}__range", id_range) for id_range in range_lookups),
+        _connector=Q.OR,
+    )
+
+
+def encode_keyset_cursor(expires, pk):
+    """
+    Encode the position of a Content Expiry record in the changelist as a cursor
+
+    :param expires: The expiry date of the record
+    :param pk: The id of the record
+    :returns: A cursor string for the changelist query string
+    """
+    return f"{expires.isoformat()}_{pk}"
+
+
+def decode_keyset_cursor(cursor):
+    """
+    Decode a cursor created by encode_keyset_cursor
+
+    :param cursor: A cursor string
+    :returns: A tuple of the expiry date and id of the record
+    :raises ValueError: If the cursor is not valid
+    """
+    expires, _, pk = cursor.rpartition("_")
+    expires = parse_datetime(expires)
+    if expires is None:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return expires, int(pk)
+
+
+def get_keyset_cursor_q(expires, pk):
+    """
+    Get a Q object for the records after a cursor position when they are ordered by expiry date and id
+    """
+    return Q(expires__gt=expires) | Q(expires=expires, pk__gt=pk)
+
+
+def get_estimated_count(queryset):
+    """
+    Estimate the number of rows in a queryset from the query planner rather than counting them,
+    the estimate is only available on PostgreSQL.
+
+    :param queryset: A queryset
+    :returns: The estimated number of rows, or None if it can't be estimated
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    # The plan is only decoded by the database driver if it knows the json type
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]["Plan Rows"]
+
+
+@lru_cache(maxsize=MAX_CACHED_URLS)
+def _get_url_fragment(template_name, language, script_prefix):
+    """
+    :returns: The parts of a template rendered around the url placeholder
+    """
+    return render_to_string(template_name, {"url": FRAGMENT_PLACEHOLDER}).split(FRAGMENT_PLACEHOLDER)
+
+
+def render_url_fragment(template_name, url):
+    """
+    Render a template that only depends on a url, the template is rendered once for
+    each language and script prefix and the url is then added to the rendered fragment.
+
+    :param template_name: The name of a template with a url variable
+    :param url: The url to render the template with
+    :returns: The rendered template
+    """
+    fragment = _get_url_fragment(template_name, get_language(), get_script_prefix())
+
+    # A template that doesn't use the url exactly once can't be split around it
+    if len(fragment) != 2:
+        return render_to_string(template_name, {"url": url})
+    return mark_safe(f"{fragment[0]}{conditional_escape(url)}{fragment[1]}")
+
+
+@lru_cache(maxsize=MAX_CACHED_URLS)
+def _get_reversed_url(viewname, language, urlconf, script_prefix):
+    """
+    :returns: The parts of a url reversed around the object id placeholder
+    """
+    return reverse(viewname, urlconf=urlconf, args=(FRAGMENT_PLACEHOLDER,)).split(FRAGMENT_PLACEHOLDER)
+
+
+def reverse_object_url(viewname, pk):
+    """
+    Reverse a url that only takes an object id, the url is reversed once for
+    each language, url configuration and script prefix and the id is then
+    added to it.
+
+    :param viewname: The name of a url with an object id argument
+    :param pk: The object id
+    :returns: The url for the object
+    """
+    url = _get_reversed_url(viewname, get_language(), get_urlconf(), get_script_prefix())
+    return f"{url[0]}{pk}{url[1]}"
@@ -1,11 +1,39 @@
+import json
+import multiprocessing
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
+from io import StringIO
 
+from django.contrib.contenttypes.models import ContentType
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
 
 from djangocms_versioning.models import Version
 
+from djangocms_content_expiry.cache import invalidate_changelist_author_cache
 from djangocms_content_expiry.models import ContentExpiry
-from djangocms_content_expiry.utils import get_future_expire_date
+from djangocms_content_expiry.utils import (
+    get_content_model_manager,
+    get_future_expire_date,
+    get_future_expire_dates,
+)
+
+
+def _populate_version_pk_range(forced_expiry_date, batch_size, version_pk_range):
+    """
+    Create the content expiry records for a range of versions in a worker process,
+    each worker process uses its own database connection. The output of a worker
+    is discarded, the versions without content are returned to be reported instead.
+    """
+    command = Command(stdout=StringIO())
+    try:
+        return command._populate_existing_version_content_expiry_records_in_bulk(
+            forced_expiry_date, batch_size, version_pk_range=version_pk_range
+        )
+    finally:
+        connections.close_all()
 
 
 class Command(BaseCommand):
@@ -42,6 +70,210 @@ class Command(BaseCommand):
                 f"Content Expiry: {expiry.pk} created for version: {version.pk}"
             )
 
+    def _read_checkpoint(self, checkpoint_file):
+        """
+        Get the last version pk processed by an interrupted run
+        """
+        if not checkpoint_file or not os.path.exists(checkpoint_file):
+            return 0
+
+        with open(checkpoint_file) as checkpoint:
+            last_version_pk = json.load(checkpoint)["last_version_pk"]
+
+        self.stdout.write(f"Resuming from checkpoint after version: {last_version_pk}")
+        return last_version_pk
+
+    def _write_checkpoint(self, checkpoint_file, last_version_pk):
+        if not checkpoint_file:
+            return
+
+        # Replace the checkpoint in a single step so that it is never left half written
+        temporary_checkpoint_file = f"{checkpoint_file}.tmp"
+        with open(temporary_checkpoint_file, "w") as checkpoint:
+            json.dump({"last_version_pk": last_version_pk}, checkpoint)
+        os.replace(temporary_checkpoint_file, checkpoint_file)
+
+    def _get_existing_content_keys(self, versions):
+        """
+        Find the versions that have a content object with a query per content type
+
+        :returns: A set of the content_type_id, object_id pairs that have a content object
+        """
+        object_ids = defaultdict(list)
+        for version in versions:
+            object_ids[version.content_type_id].append(version.object_id)
+
+        existing_content_keys = set()
+        for content_type_id, content_type_object_ids in object_ids.items():
+            content_model = ContentType.objects.get_for_id(content_type_id).model_class()
+            # The model of a stale content type no longer exists
+            if content_model is None:
+                continue
+
+            existing_object_ids = get_content_model_manager(content_model).filter(
+                pk__in=content_type_object_ids
+            ).values_list("pk", flat=True)
+            existing_content_keys.update(
+                (content_type_id, object_id) for object_id in existing_object_ids
+            )
+        return existing_content_keys
+
+    def _populate_existing_version_content_expiry_records_in_bulk(
+        self, forced_expiry_date, batch_size, checkpoint_file=None, version_pk_range=None
+    ):
+        """
+        Create any content expiry records for versions in the system in batches of versions
+        ordered by pk, each batch is created in a single transaction and recorded in the
+        checkpoint file once it has been committed.
+
+        :param version_pk_range: An optional inclusive range of version pks to limit the versions to
+        :returns: The number of records created and a list of the pks of the versions without content
+        """
+        versions = Version.objects.filter(contentexpiry__isnull=True).order_by("pk")
+
+        if version_pk_range:
+            first_version_pk, last_range_version_pk = version_pk_range
+            versions = versions.filter(pk__lte=last_range_version_pk)
+            last_version_pk = first_version_pk - 1
+        else:
+            last_version_pk = self._read_checkpoint(checkpoint_file)
+
+        created_count = 0
+        missing_content_version_pks = []
+
+        while True:
+            version_batch = list(versions.filter(pk__gt=last_version_pk)[:batch_size])
+            if not version_batch:
+                break
+
+            existing_content_keys = self._get_existing_content_keys(version_batch)
+            content_versions = []
+
+            for version in version_batch:
+                # Catch any versions that have no content object attached
+                if (version.content_type_id, version.object_id) not in existing_content_keys:
+                    self._write_missing_content_warning(version.pk)
+                    missing_content_version_pks.append(version.pk)
+                    continue
+                content_versions.append(version)
+
+            # Use a fixed date
+            if forced_expiry_date:
+                expiry_dates = [forced_expiry_date] * len(content_versions)
+            else:
+                # Otherwise: Use the modified date because this is the date that a published
+                # version was published which is what really matters for Expired content!
+                expiry_dates = get_future_expire_dates(
+                    (version, version.modified) for version in content_versions
+                )
+
+            expiry_records = []
+            for version, expiry_date in zip(content_versions, expiry_dates):
+                expiry = ContentExpiry(
+                    created_by_id=version.created_by_id,
+                    version=version,
+                    expires=expiry_date,
+                )
+                # bulk_create doesn't call save so the version fields are copied here
+                expiry.update_version_fields()
+                expiry_records.append(expiry)
+
+            with transaction.atomic():
+                # A record created for a version since the batch was read is left as it is
+                existing_version_pks = set(
+                    ContentExpiry.objects.filter(
+                        version_id__in=[version.pk for version in content_versions]
+                    ).values_list("version_id", flat=True)
+                )
+                expiry_records = [
+                    expiry for expiry in expiry_records if expiry.version_id not in existing_version_pks
+                ]
+                ContentExpiry.objects.bulk_create(expiry_records, ignore_conflicts=True)
+                created_count += len(expiry_records)
+
+            last_version_pk = version_batch[-1].pk
+            self._write_checkpoint(checkpoint_file, last_version_pk)
+
+            self.stdout.write(
+                f"Processed versions up to: {last_version_pk}, "
+                f"{created_count} Content Expiry records created"
+            )
+
+        # The run is complete so the next run starts from the beginning
+        if checkpoint_file and os.path.exists(checkpoint_file):
+            os.remove(checkpoint_file)
+
+        return created_count, missing_content_version_pks
+
+    def _write_missing_content_warning(self, version_pk):
+        self.stdout.write(self.style.WARNING(f"No content found for version: {version_pk}"))
+
+    def _get_version_pk_ranges(self, batch_size):
+        """
+        Split the pks of the versions without a content expiry record into disjoint ranges
+        of a batch of versions each, the ranges are shared out between the workers
+
+        :returns: A list of inclusive start, end pk tuples
+        """
+        version_pks = Version.objects.filter(contentexpiry__isnull=True).order_by("pk").values_list("pk", flat=True)
+        version_pk_ranges = []
+        last_version_pk = 0
+
+        while True:
+            version_pk_batch = list(version_pks.filter(pk__gt=last_version_pk)[:batch_size])
+            if not version_pk_batch:
+                break
+
+            last_version_pk = version_pk_batch[-1]
+            version_pk_ranges.append((version_pk_batch[0], last_version_pk))
+        return version_pk_ranges
+
+    def _populate_existing_version_content_expiry_records_in_parallel(
+        self, forced_expiry_date, batch_size, workers
+    ):
+        """
+        Create any content expiry records for versions in the system with a pool of worker
+        processes, the versions are split into batches with separate ranges of version pks
+        so a version is never processed by more than one worker.
+
+        :returns: The number of records created and a list of the pks of the versions without content
+        """
+        try:
+            mp_context = multiprocessing.get_context("fork")
+        except ValueError:
+            raise CommandError("More than 1 worker requires the fork start method, which this platform doesn't support")
+
+        version_pk_ranges = self._get_version_pk_ranges(batch_size)
+        created_count = 0
+        missing_content_version_pks = []
+
+        # The worker processes are forked, they must not share the open database connections
+        connections.close_all()
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+            futures = {
+                executor.submit(
+                    _populate_version_pk_range, forced_expiry_date, batch_size, version_pk_range
+                ): version_pk_range
+                for version_pk_range in version_pk_ranges
+            }
+
+            for processed_count, future in enumerate(as_completed(futures), start=1):
+                first_version_pk, last_version_pk = futures[future]
+                range_created_count, range_missing_content_version_pks = future.result()
+                created_count += range_created_count
+                missing_content_version_pks.extend(range_missing_content_version_pks)
+
+                for version_pk in range_missing_content_version_pks:
+                    self._write_missing_content_warning(version_pk)
+                self.stdout.write(
+                    f"Processed versions: {first_version_pk} to {last_version_pk}, "
+                    f"batch {processed_count} of {len(futures)}, "
+                    f"{created_count} Content Expiry records created"
+                )
+
+        return created_count, missing_content_version_pks
+
     def _validate_user_supplied_date(self, expiry_date_string, expiry_date_format):
         """
         Ensure that the date supplied is valid.
@@ -72,6 +304,29 @@ class Command(BaseCommand):
             help="The format that the expiry_date is provided. "
                  "Uses strptime with the default format: %Y-%m-%d e.g. 2030-03-30"
         )
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help="Create the expiry records in batches, recommended for sites with a lot of versions."
+        )
+        parser.add_argument(
+            '--batch_size',
+            type=int,
+            default=1000,
+            help="The number of versions processed in each batch when using --bulk, defaults to: 1000"
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help="The number of worker processes that create the records when using --bulk, defaults to: 1"
+        )
+        parser.add_argument(
+            '--checkpoint_file',
+            nargs='?',
+            help="A file that records the progress when using --bulk, "
+                 "an interrupted run is resumed from the checkpoint saved in the file."
+        )
 
     def handle(self, *args, **options):
         self.stdout.write(f"Starting {__name__}")
@@ -83,6 +338,36 @@ class Command(BaseCommand):
         if expiry_date_string:
             expiry_date = self._validate_user_supplied_date(expiry_date_string, expiry_date_format)
 
-        self._populate_existing_version_content_expiry_records(expiry_date)
+        if options['bulk']:
+            if options['batch_size'] < 1:
+                raise CommandError("The batch_size must be at least 1")
+
+            if options['workers'] < 1:
+                raise CommandError("The number of workers must be at least 1")
+
+            if options['workers'] > 1:
+                if options['checkpoint_file']:
+                    raise CommandError("A checkpoint_file can't be used with more than 1 worker")
+
+                created_count, missing_content_version_pks = (
+                    self._populate_existing_version_content_expiry_records_in_parallel(
+                        expiry_date, options['batch_size'], options['workers']
+                    )
+                )
+            else:
+                created_count, missing_content_version_pks = (
+                    self._populate_existing_version_content_expiry_records_in_bulk(
+                        expiry_date, options['batch_size'], options['checkpoint_file']
+                    )
+                )
+
+            # bulk_create doesn't send the signals that keep the author filter up to date
+            invalidate_changelist_author_cache()
+            self.stdout.write(
+                f"Created {created_count} Content Expiry records, "
+                f"skipped {len(missing_content_version_pks)} versions with no content"
+            )
+        else:
+            self._populate_existing_version_content_expiry_records(expiry_date)
 
         self.stdout.write(self.style.SUCCESS(f"Finished {__name__}"))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from djangocms_content_expiry.constants import CONTENT_EXPIRY_EXPORT_JOB_PENDING
+from djangocms_content_expiry.exports import requeue_stale_export_jobs, run_export_job
+from djangocms_content_expiry.models import ContentExpiryExportJob
+
+
+class Command(BaseCommand):
+    help = 'Runs any pending Content Expiry csv export jobs, including the jobs abandoned while running'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Starting {__name__}")
+
+        requeued_count = requeue_stale_export_jobs()
+        if requeued_count:
+            self.stdout.write(f"Queued {requeued_count} stale export jobs to be run again")
+
+        for job in ContentExpiryExportJob.objects.filter(status=CONTENT_EXPIRY_EXPORT_JOB_PENDING).order_by("pk"):
+            self.stdout.write(f"Processing export job: {job.pk}")
+
+            try:
+                run_export_job(job)
+            except Exception as error:
+                self.stdout.write(self.style.ERROR(f"Export job: {job.pk} failed: {error}"))
+                continue
+
+            self.stdout.write(
+                f"Export job: {job.pk} exported {job.rows_processed} rows at {job.rows_per_second} rows per second"
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Finished {__name__}"))
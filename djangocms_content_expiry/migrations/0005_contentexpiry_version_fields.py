@@ -0,0 +1,45 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('djangocms_content_expiry', '0004_alter_contentexpiry_compliance_number'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contentexpiry',
+            name='content_type',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.contenttype', verbose_name='content type'),
+        ),
+        migrations.AddField(
+            model_name='contentexpiry',
+            name='object_id',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='contentexpiry',
+            name='state',
+            field=models.CharField(choices=[('draft', 'Draft'), ('published', 'Published'), ('unpublished', 'Unpublished'), ('archived', 'Archived')], editable=False, max_length=50, null=True, verbose_name='version state'),
+        ),
+        migrations.AddField(
+            model_name='contentexpiry',
+            name='version_author',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='version author'),
+        ),
+        migrations.AddIndex(
+            model_name='contentexpiry',
+            index=models.Index(fields=['content_type', 'object_id'], name='contentexpiry_ctype_object_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contentexpiry',
+            index=models.Index(fields=['state', 'expires'], name='contentexpiry_state_expiry_idx'),
+        ),
+    ]
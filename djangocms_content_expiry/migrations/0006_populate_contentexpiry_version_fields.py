@@ -0,0 +1,30 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def populate_version_fields(apps, schema_editor):
+    """
+    Copy the version fields used by the changelist filters onto the existing records
+    with a single update statement.
+    """
+    ContentExpiry = apps.get_model('djangocms_content_expiry', 'ContentExpiry')
+    Version = apps.get_model('djangocms_versioning', 'Version')
+
+    version = Version.objects.filter(pk=OuterRef('version_id'))
+    ContentExpiry.objects.update(
+        content_type=Subquery(version.values('content_type_id')[:1]),
+        object_id=Subquery(version.values('object_id')[:1]),
+        state=Subquery(version.values('state')[:1]),
+        version_author=Subquery(version.values('created_by_id')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangocms_content_expiry', '0005_contentexpiry_version_fields'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_version_fields, migrations.RunPython.noop),
+    ]
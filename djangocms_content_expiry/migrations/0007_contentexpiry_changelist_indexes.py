@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangocms_content_expiry', '0006_populate_contentexpiry_version_fields'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contentexpiry',
+            index=models.Index(fields=['expires'], name='contentexpiry_expires_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contentexpiry',
+            index=models.Index(fields=['compliance_number'], name='contentexpiry_compliance_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contentexpiry',
+            index=models.Index(fields=['created_by', 'expires'], name='contentexpiry_user_expiry_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:13
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('djangocms_content_expiry', '0007_contentexpiry_changelist_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentExpiryExportJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('query_string', models.TextField(blank=True, help_text='The Content Expiry changelist filters that are exported')),
+                ('base_url', models.CharField(help_text='The scheme and host used to build the exported urls', max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20, verbose_name='status')),
+                ('rows_processed', models.PositiveIntegerField(default=0, verbose_name='rows processed')),
+                ('started', models.DateTimeField(blank=True, null=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('file', models.FileField(blank=True, upload_to='djangocms_content_expiry/exports/')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='created by')),
+            ],
+            options={
+                'verbose_name': 'Content Expiry Export',
+                'verbose_name_plural': 'Content Expiry Exports',
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 05:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangocms_content_expiry', '0008_contentexpiryexportjob'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='contentexpiry',
+            name='contentexpiry_user_expiry_idx',
+        ),
+        migrations.AddIndex(
+            model_name='contentexpiry',
+            index=models.Index(fields=['version_author', 'expires'], name='contentexpiry_author_exp_idx'),
+        ),
+    ]
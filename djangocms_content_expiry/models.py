@@ -1,12 +1,19 @@
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
+from djangocms_versioning.constants import VERSION_STATES
 from djangocms_versioning.models import Version
 
 from .conf import DEFAULT_CONTENT_EXPIRY_DURATION
-from .constants import CONTENT_EXPIRY_EXPIRE_FIELD_LABEL
+from .constants import (
+    CONTENT_EXPIRY_EXPIRE_FIELD_LABEL,
+    CONTENT_EXPIRY_EXPORT_JOB_PENDING,
+    CONTENT_EXPIRY_EXPORT_JOB_STATUSES,
+    CONTENT_EXPIRY_VERSION_FIELDS,
+)
 
 
 def _limit_content_type_choices():
@@ -14,11 +21,9 @@ def _limit_content_type_choices():
     Get a limited list of the content types that the
     DefaultContentExpiryConfiguration model can use
     """
-    from .utils import get_versionable_content_types
+    from .utils import get_versionable_content_type_ids
 
-    content_type_list = get_versionable_content_types()
-    inclusion = [content_type.pk for content_type in content_type_list]
-    return {"id__in": inclusion}
+    return {"id__in": get_versionable_content_type_ids()}
 
 
 class ContentExpiry(models.Model):
@@ -35,10 +40,62 @@ class ContentExpiry(models.Model):
         verbose_name=_('version')
     )
     expires = models.DateTimeField(CONTENT_EXPIRY_EXPIRE_FIELD_LABEL)
+    # Copies of the version fields that the changelist filters on, these allow the changelist
+    # to be filtered without joining the version table and are kept in sync with the version
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        null=True,
+        editable=False,
+        related_name='+',
+        verbose_name=_('content type')
+    )
+    object_id = models.PositiveIntegerField(null=True, editable=False)
+    state = models.CharField(
+        max_length=50,
+        choices=VERSION_STATES,
+        null=True,
+        editable=False,
+        verbose_name=_('version state')
+    )
+    version_author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.PROTECT,
+        null=True,
+        editable=False,
+        related_name='+',
+        verbose_name=_('version author')
+    )
 
     class Meta:
         verbose_name = _("Content Expiry")
         verbose_name_plural = _("Content Expiry")
+        indexes = [
+            models.Index(fields=['content_type', 'object_id'], name='contentexpiry_ctype_object_idx'),
+            models.Index(fields=['state', 'expires'], name='contentexpiry_state_expiry_idx'),
+            models.Index(fields=['expires'], name='contentexpiry_expires_idx'),
+            models.Index(fields=['compliance_number'], name='contentexpiry_compliance_idx'),
+            models.Index(fields=['version_author', 'expires'], name='contentexpiry_author_exp_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # The version fields of an existing record are kept in sync by the version signal
+        # handlers, so the version is only loaded when they are created or saved explicitly
+        update_fields = kwargs.get("update_fields")
+        if self._state.adding or (update_fields and not CONTENT_EXPIRY_VERSION_FIELDS.isdisjoint(update_fields)):
+            self.update_version_fields()
+        super().save(*args, **kwargs)
+
+    def update_version_fields(self):
+        """
+        Copy the version fields used by the changelist filters onto the record.
+        Must be called explicitly when records are created with bulk_create.
+        """
+        version = self.version
+        self.content_type_id = version.content_type_id
+        self.object_id = version.object_id
+        self.state = version.state
+        self.version_author_id = version.created_by_id
 
 
 class DefaultContentExpiryConfiguration(models.Model):
@@ -57,3 +114,49 @@ class DefaultContentExpiryConfiguration(models.Model):
 
     def __str__(self):
         return str(self.content_type)
+
+
+class ContentExpiryExportJob(models.Model):
+    created = models.DateTimeField(auto_now_add=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        verbose_name=_('created by')
+    )
+    query_string = models.TextField(
+        blank=True,
+        help_text=_("The Content Expiry changelist filters that are exported")
+    )
+    base_url = models.CharField(
+        max_length=255,
+        help_text=_("The scheme and host used to build the exported urls")
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=CONTENT_EXPIRY_EXPORT_JOB_STATUSES,
+        default=CONTENT_EXPIRY_EXPORT_JOB_PENDING,
+        verbose_name=_('status')
+    )
+    rows_processed = models.PositiveIntegerField(default=0, verbose_name=_('rows processed'))
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+    file = models.FileField(upload_to="djangocms_content_expiry/exports/", blank=True)
+
+    class Meta:
+        verbose_name = _("Content Expiry Export")
+        verbose_name_plural = _("Content Expiry Exports")
+
+    def __str__(self):
+        return str(self.created)
+
+    @property
+    def rows_per_second(self):
+        """
+        The export rate of a started job, measured to now while the job is still running
+        """
+        if not self.started:
+            return None
+        seconds = ((self.finished or timezone.now()) - self.started).total_seconds()
+        if not seconds:
+            return None
+        return round(self.rows_processed / seconds, 1)
@@ -1,4 +1,6 @@
 from django.conf.urls import url
+from django.db import transaction
+from django.db.models import F
 from django.shortcuts import redirect
 from django.template.loader import render_to_string
 from django.urls import reverse
@@ -7,19 +9,46 @@ from djangocms_moderation import admin as moderation_admin
 from djangocms_moderation.models import ModerationCollection, ModerationRequest
 from djangocms_versioning import admin
 
+from djangocms_content_expiry.cache import invalidate_changelist_author_cache
 from djangocms_content_expiry.constants import CONTENT_EXPIRY_COMPLIANCE_FIELD_LABEL
 from djangocms_content_expiry.models import ContentExpiry
 
 
+def get_queryset(func):
+    """
+    Read the content expiry fields shown by the Versioning Admin in the changelist query,
+    rather than with a query for every row
+    """
+    def inner(self, request):
+        queryset = func(self, request)
+        return queryset.annotate(
+            content_expiry_id=F("contentexpiry__pk"),
+            content_expiry_compliance_number=F("contentexpiry__compliance_number"),
+        )
+    return inner
+
+
+admin.VersionAdmin.get_queryset = get_queryset(admin.VersionAdmin.get_queryset)
+
+
 def _get_expiry_link(self, obj, request):
     """
     Generate a content expiry link for the Versioning Admin
     """
+    if hasattr(obj, "content_expiry_id"):
+        content_expiry_id = obj.content_expiry_id
+    else:
+        content_expiry_id = obj.contentexpiry.pk
+
+    # A version without a content expiry record has nothing to link to
+    if content_expiry_id is None:
+        return ""
+
     expiry_url = reverse(
         "admin:{app}_{model}_change".format(
             app=ContentExpiry._meta.app_label, model=ContentExpiry._meta.model_name
         ),
-        args=(obj.contentexpiry.pk,),
+        args=(content_expiry_id,),
     )
     return render_to_string(
         'djangocms_content_expiry/admin/icons/additional_content_settings_icon.html',
@@ -48,6 +77,11 @@ admin.VersionAdmin.get_state_actions = get_state_actions(admin.VersionAdmin.get_
 
 
 def compliance_number(self, obj):
+    if hasattr(obj, "content_expiry_id"):
+        if obj.content_expiry_id is None:
+            return ""
+        return obj.content_expiry_compliance_number
+
     version = ContentExpiry.objects.filter(version=obj.pk)
     if version:
         return version[0].compliance_number
@@ -73,6 +107,25 @@ def get_list_display(func):
 admin.VersionAdmin.get_list_display = get_list_display(admin.VersionAdmin.get_list_display)
 
 
+def get_moderation_request_queryset(func):
+    """
+    Prefetch the content expiry records shown by the Moderation Request Admin,
+    rather than querying them for every row
+    """
+    def inner(self, request):
+        queryset = func(self, request)
+        return queryset.prefetch_related(
+            "moderation_request__collection",
+            "moderation_request__version__contentexpiry",
+        )
+    return inner
+
+
+moderation_admin.ModerationRequestTreeAdmin.get_queryset = get_moderation_request_queryset(
+    moderation_admin.ModerationRequestTreeAdmin.get_queryset
+)
+
+
 def _get_urls(func):
     """
     Add custom Version Lock urls to Versioning urls
@@ -106,7 +159,9 @@ def copy_content_expiry_view(self, request):
 
     if collection_id and moderation_request_id:
         collection = ModerationCollection.objects.get(id=collection_id)
-        moderation_request = ModerationRequest.objects.get(id=moderation_request_id)
+        moderation_request = ModerationRequest.objects.select_related("version__contentexpiry").get(
+            id=moderation_request_id
+        )
         version = moderation_request.version
 
         redirect_url = reverse('admin:djangocms_moderation_moderationrequesttreenode_changelist')
@@ -117,24 +172,33 @@ def copy_content_expiry_view(self, request):
 
         if hasattr(version, "contentexpiry"):
             content_expiry = version.contentexpiry
+            copied_field = "compliance_number" if compliance_copy == "compliance" else "expires"
+            updated_expiry_records = []
+            created_expiry_records = []
 
-            for mr in collection.moderation_requests.all():
+            for mr in collection.moderation_requests.select_related("version__contentexpiry"):
                 mr_version = mr.version
                 if hasattr(mr_version, "contentexpiry"):
-                    if compliance_copy == "compliance":
-                        mr_content_expiry = mr_version.contentexpiry
-                        mr_content_expiry.compliance_number = content_expiry.compliance_number
-                        mr_content_expiry.save()
-                    else:
-                        mr_content_expiry = mr_version.contentexpiry
-                        mr_content_expiry.expires = content_expiry.expires
-                        mr_content_expiry.save()
+                    mr_content_expiry = mr_version.contentexpiry
+                    setattr(mr_content_expiry, copied_field, getattr(content_expiry, copied_field))
+                    updated_expiry_records.append(mr_content_expiry)
                 else:
-                    ContentExpiry.objects.create(
+                    mr_content_expiry = ContentExpiry(
                         created_by=request.user,
                         version=mr_version,
                         expires=content_expiry.expires,
                     )
+                    # bulk_create doesn't call save so the version fields are copied here
+                    mr_content_expiry.update_version_fields()
+                    created_expiry_records.append(mr_content_expiry)
+
+            with transaction.atomic():
+                ContentExpiry.objects.bulk_update(updated_expiry_records, [copied_field])
+                ContentExpiry.objects.bulk_create(created_expiry_records)
+
+            if created_expiry_records:
+                # bulk_create doesn't send the signals that keep the author filter up to date
+                invalidate_changelist_author_cache()
 
         return redirect(redirect_url)
 
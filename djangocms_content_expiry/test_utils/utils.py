@@ -1,3 +1,6 @@
+from contextlib import contextmanager
+from unittest.mock import patch
+
 from django.apps import apps
 from django.contrib.contenttypes.models import ContentType
 
@@ -18,3 +21,25 @@ def _get_content_types_set():
 
     # The list is equal to the content type versionables, get a unique list
     return set(content_types)
+
+
+@contextmanager
+def capture_on_commit_callbacks(execute=False):
+    """
+    Capture the callbacks registered with transaction.on_commit, running them on exit
+    when execute is set. Matches TestCase.captureOnCommitCallbacks which is only
+    available from Django 3.2.
+    """
+    callbacks = []
+
+    def on_commit(func, using=None):
+        callbacks.append(func)
+
+    with patch("django.db.transaction.on_commit", side_effect=on_commit):
+        yield callbacks
+        if execute:
+            # A callback can register further callbacks, run those too
+            index = 0
+            while index < len(callbacks):
+                callbacks[index]()
+                index += 1
@@ -1,19 +1,25 @@
+from collections import defaultdict
+
 from django.apps import apps
 from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
 
 from dateutil.relativedelta import relativedelta
+from djangocms_versioning.constants import PUBLISHED
 from djangocms_versioning.datastructures import VersionableItemAlias
+from djangocms_versioning.helpers import get_preview_url
+from djangocms_versioning.models import Version
 
+from .cache import get_default_duration_cache_version
 from .conf import DEFAULT_CONTENT_EXPIRY_DURATION
 from .models import DefaultContentExpiryConfiguration
 
 
-def _get_version_content_model_content_type(version):
-    """
-    Returns a content type that describes the content
-    """
-    # Otherwise, use the content type registered by the version
-    return version.content_type
+# The default durations loaded by this process and the configuration version they were loaded for
+_default_duration_map = None
+_default_duration_map_version = None
+# The versioned content models, the versionable registry doesn't change once the apps are loaded
+_versionable_content_models = None
 
 
 def get_default_duration_for_version(version):
@@ -21,13 +27,47 @@ def get_default_duration_for_version(version):
     Returns a default expiration value dependant on whether an entry exists for
     a content type in DefaultContentExpiryConfiguration.
     """
-    content_type = _get_version_content_model_content_type(version)
-    default_configuration = DefaultContentExpiryConfiguration.objects.filter(
-        content_type=content_type
-    )
-    if default_configuration:
-        return relativedelta(months=default_configuration[0].duration)
-    return relativedelta(months=DEFAULT_CONTENT_EXPIRY_DURATION)
+    # The content type id is used so that no query is needed for the content type
+    return get_default_duration_for_content_type_id(get_cached_default_duration_map(), version.content_type_id)
+
+
+def get_default_duration_map():
+    """
+    Returns the default expiration durations set in DefaultContentExpiryConfiguration,
+    loaded with a single query.
+
+    :returns: A dict of relativedelta durations keyed by content type id
+    """
+    return {
+        content_type_id: relativedelta(months=duration)
+        for content_type_id, duration in DefaultContentExpiryConfiguration.objects.values_list(
+            "content_type_id", "duration"
+        )
+    }
+
+
+def get_cached_default_duration_map():
+    """
+    Returns the default expiration durations loaded by this process, the durations are
+    reloaded whenever the configuration version in the cache changes.
+
+    :returns: A dict of relativedelta durations keyed by content type id
+    """
+    global _default_duration_map, _default_duration_map_version
+
+    version = get_default_duration_cache_version()
+    # Without a version there is no way to know that the durations are up to date
+    if _default_duration_map is None or version is None or version != _default_duration_map_version:
+        _default_duration_map = get_default_duration_map()
+        _default_duration_map_version = version
+    return _default_duration_map
+
+
+def get_default_duration_for_content_type_id(duration_map, content_type_id):
+    """
+    Returns a default expiration value for a content type from a map created by get_default_duration_map
+    """
+    return duration_map.get(content_type_id, relativedelta(months=DEFAULT_CONTENT_EXPIRY_DURATION))
 
 
 def get_future_expire_date(version, date):
@@ -37,15 +77,197 @@ def get_future_expire_date(version, date):
     return date + get_default_duration_for_version(version)
 
 
+def get_future_expire_dates(version_dates):
+    """
+    Returns the expiry dates for many versions at once, the durations are looked up
+    once per content type rather than once per version.
+
+    :param version_dates: An iterable of version, date tuples e.g.
+        ((version, version.modified) for version in versions)
+    :returns: A list of the expiry dates in the same order as the versions
+    """
+    duration_map = get_cached_default_duration_map()
+    content_type_durations = {}
+    expiry_dates = []
+
+    for version, date in version_dates:
+        try:
+            duration = content_type_durations[version.content_type_id]
+        except KeyError:
+            duration = content_type_durations[version.content_type_id] = (
+                get_default_duration_for_content_type_id(duration_map, version.content_type_id)
+            )
+        expiry_dates.append(date + duration)
+    return expiry_dates
+
+
+def get_versionable_content_models():
+    """
+    Returns the content models that are versioned, the versionables are registered
+    while the apps are loaded so the list is only built once
+    """
+    global _versionable_content_models
+
+    if _versionable_content_models is None:
+        content_models = []
+        versioning_config = apps.get_app_config("djangocms_versioning")
+
+        for versionable in versioning_config.cms_extension.versionables:
+            if not isinstance(versionable, VersionableItemAlias) and versionable.content_model not in content_models:
+                content_models.append(versionable.content_model)
+        _versionable_content_models = tuple(content_models)
+    return _versionable_content_models
+
+
 def get_versionable_content_types():
     """
     Returns a list of content type objects that are versioned
     """
-    content_types = []
-    versioning_config = apps.get_app_config("djangocms_versioning")
+    content_models = get_versionable_content_models()
+    # The content types are resolved from the ContentType cache, which is cleared if they are recreated
+    content_types = ContentType.objects.get_for_models(*content_models)
+    return [content_types[content_model] for content_model in content_models]
+
+
+def get_versionable_content_type_ids():
+    """
+    Returns a list of the ids of the content types that are versioned
+    """
+    return [content_type.pk for content_type in get_versionable_content_types()]
+
+
+def get_content_model_manager(content_model):
+    """
+    Returns a manager that can see every content object, regardless of the version state
+    """
+    # Versioning replaces the default manager with one that only returns published content
+    return getattr(content_model, "_original_manager", content_model._base_manager)
+
+
+def prefetch_version_content(content_expiry_list):
+    """
+    Resolve the content objects of the versions attached to a list of content expiry
+    records using a single query per content type rather than a query per record.
+    The resolved content objects are attached to each version and can be read
+    with get_version_content without querying the database again.
+
+    :param content_expiry_list: An iterable of ContentExpiry objects
+    :returns: The list of ContentExpiry objects supplied
+    """
+    content_expiry_list = list(content_expiry_list)
+    content_field = Version._meta.get_field("content")
+    grouped_versions = defaultdict(list)
+
+    for content_expiry in content_expiry_list:
+        version = content_expiry.version
+        if not content_field.is_cached(version):
+            grouped_versions[version.content_type_id].append(version)
+
+    for content_type_id, versions in grouped_versions.items():
+        content_model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if content_model is None:
+            continue
+        content_objects = get_content_model_manager(content_model).in_bulk(
+            {version.object_id for version in versions}
+        )
+        for version in versions:
+            content_field.set_cached_value(version, content_objects.get(version.object_id))
+
+    return content_expiry_list
+
+
+def get_version_content(version):
+    """
+    Returns the content object of a version, preferring a content object that has
+    already been attached by prefetch_version_content.
+
+    Polymorphic content is stored against the parent content type so the
+    GenericForeignKey would otherwise discard the prefetched child object.
+    """
+    content_field = Version._meta.get_field("content")
+    if content_field.is_cached(version):
+        return content_field.get_cached_value(version)
+    return version.content
+
+
+def get_content_expiry_preview_url(content_expiry):
+    """
+    Find a valid preview url for the content object of a content expiry record,
+    preferring a url that has already been attached by prefetch_preview_urls.
+
+    :param content_expiry: A ContentExpiry object
+    :returns: A valid preview url to link to the content object
+    """
+    if hasattr(content_expiry, "_preview_url"):
+        return content_expiry._preview_url
+
+    content_obj = get_version_content(content_expiry.version)
+    # If the version is published, first try and get a "live" url
+    if content_expiry.version.state == PUBLISHED:
+        if hasattr(content_obj, "get_absolute_url"):
+            return content_obj.get_absolute_url()
+    # If the content object has a preview url, get it
+    if hasattr(content_obj, "get_preview_url"):
+        return content_obj.get_preview_url()
+    # Otherwise, all else has failed, try and get a preview url
+    return get_preview_url(content_obj)
+
+
+def _get_preview_url_resolver(resolvers, content_model):
+    # Resolvers registered for a parent model are used for its child models, i.e. polymorphic content
+    for model in content_model.__mro__:
+        if model in resolvers:
+            return resolvers[model]
+    return None
+
+
+def prefetch_preview_urls(content_expiry_list):
+    """
+    Resolve the preview urls of a list of content expiry records. The records of a content
+    model with a resolver registered in djangocms_content_expiry_preview_url_resolvers
+    are passed to the resolver together, so it can read what it needs with a query per
+    content model rather than a query per record. The resolved urls are attached to each
+    record and can be read with get_content_expiry_preview_url.
+
+    :param content_expiry_list: An iterable of ContentExpiry objects
+    :returns: The list of ContentExpiry objects supplied
+    """
+    content_expiry_list = prefetch_version_content(content_expiry_list)
+    resolvers = apps.get_app_config("djangocms_content_expiry").cms_extension.expiry_preview_url_resolvers
+    grouped_content_expiry = defaultdict(list)
+
+    for content_expiry in content_expiry_list:
+        content_obj = get_version_content(content_expiry.version)
+        if content_obj is not None:
+            grouped_content_expiry[content_obj.__class__].append(content_expiry)
+
+    for content_model, content_expiry_group in grouped_content_expiry.items():
+        resolver = _get_preview_url_resolver(resolvers, content_model)
+        if resolver is None:
+            continue
+        for content_expiry, preview_url in zip(content_expiry_group, resolver(content_expiry_group)):
+            content_expiry._preview_url = preview_url
+
+    return content_expiry_list
+
+
+def get_content_type_predicate(predicates, request):
+    """
+    Merge the predicates registered for content models into a single Q object, so that
+    the changelist is filtered with one WHERE clause however many apps register predicates.
+    The records of every content model without a predicate are kept.
+
+    :param predicates: A dict of content models and callables that take a request and
+        return a Q object for the ContentExpiry records to keep
+    :param request: A request object if one exists
+    :returns: A Q object, or None if there are no predicates
+    """
+    if not predicates:
+        return None
+
+    content_types = ContentType.objects.get_for_models(*predicates)
+    merged_predicate = ~Q(content_type__in=[content_types[content_model] for content_model in predicates])
 
-    for versionable in versioning_config.cms_extension.versionables:
-        if not isinstance(versionable, VersionableItemAlias):
-            content_type = ContentType.objects.get_for_model(versionable.content_model)
-            content_types.append(content_type)
-    return content_types
+    for content_model, predicate in predicates.items():
+        merged_predicate |= Q(content_type=content_types[content_model]) & predicate(request)
+    return merged_predicate
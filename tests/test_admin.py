@@ -1,9 +1,14 @@
 import datetime
+from unittest.mock import patch
 
+from django.apps import apps
 from django.contrib import admin
 from django.contrib.sites.models import Site
 from django.contrib.sites.shortcuts import get_current_site
+from django.db import connection
+from django.db.models import Q
 from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from cms.api import create_page
@@ -14,6 +19,15 @@ from bs4 import BeautifulSoup
 from djangocms_versioning.constants import ARCHIVED, DRAFT, PUBLISHED, UNPUBLISHED
 
 from djangocms_content_expiry.admin import ContentExpiryAdmin
+from djangocms_content_expiry.cache import (
+    get_changelist_exclusion_cache_stats,
+    invalidate_changelist_author_cache,
+    reset_changelist_exclusion_cache_stats,
+)
+from djangocms_content_expiry.cms_config import (
+    content_expiry_site_page_content_excluded_set,
+    content_expiry_site_page_content_predicate,
+)
 from djangocms_content_expiry.conf import DEFAULT_CONTENT_EXPIRY_EXPORT_DATE_FORMAT
 from djangocms_content_expiry.constants import CONTENT_EXPIRY_FIELDSETS
 from djangocms_content_expiry.forms import ForeignKeyReadOnlyWidget
@@ -25,10 +39,12 @@ from djangocms_content_expiry.test_utils.factories import (
     DefaultContentExpiryConfigurationFactory,
 )
 from djangocms_content_expiry.test_utils.polls.factories import PollContentExpiryFactory
+from djangocms_content_expiry.test_utils.polls.models import PollContent
 from djangocms_content_expiry.test_utils.polymorphic_project.factories import (
     ArtProjectContentExpiryFactory,
 )
 from djangocms_content_expiry.test_utils.utils import _get_content_types_set
+from djangocms_content_expiry.utils import get_content_type_predicate
 
 
 class ContentExpiryAdminViewsPermissionsTestCase(CMSTestCase):
@@ -275,6 +291,191 @@ class ContentExpiryChangelistTestCase(CMSTestCase):
             link_title_tooltip, 'Additional Content Settings'
         )
 
+    def test_changelist_content_queries_do_not_grow_with_rows(self):
+        """
+        The content objects shown in the title column are resolved per content type
+        so adding more rows should not add more queries.
+        """
+        expires = timezone.now() + datetime.timedelta(days=5)
+        endpoint = self.get_admin_url(ContentExpiry, "changelist")
+        PollContentExpiryFactory(expires=expires, version__state=PUBLISHED)
+        ArtProjectContentExpiryFactory(expires=expires, version__state=PUBLISHED)
+
+        with self.login_user_context(self.get_superuser()):
+            # Warm up any caches, i.e. content types, before measuring
+            self.client.get(endpoint)
+            with CaptureQueriesContext(connection) as initial_queries:
+                response = self.client.get(endpoint)
+
+        self.assertEqual(len(response.context_data['cl'].result_list), 2)
+
+        PollContentExpiryFactory.create_batch(3, expires=expires, version__state=PUBLISHED)
+        ArtProjectContentExpiryFactory.create_batch(3, expires=expires, version__state=PUBLISHED)
+
+        with self.login_user_context(self.get_superuser()):
+            # The new records invalidate the cached authors
+            self.client.get(endpoint)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(endpoint)
+
+        self.assertEqual(len(response.context_data['cl'].result_list), 8)
+        self.assertEqual(len(queries), len(initial_queries))
+
+
+class ContentExpiryChangelistRequestQuerysetTestCase(CMSTestCase):
+    def setUp(self):
+        expires = timezone.now() + datetime.timedelta(days=5)
+        PollContentExpiryFactory.create_batch(2, expires=expires, version__state=PUBLISHED)
+        self.superuser = self.get_superuser()
+        reset_changelist_exclusion_cache_stats()
+        self.addCleanup(reset_changelist_exclusion_cache_stats)
+
+    def _get_page_content_exclusion_lookups(self):
+        stats = get_changelist_exclusion_cache_stats()["page_content"]
+        return stats["hits"] + stats["misses"]
+
+    def test_site_filters_are_applied_once_for_a_changelist_request(self):
+        """
+        The changelist and the author filter share the site filtered queryset of the request
+        """
+        # The author filter reads the queryset when its options are not cached
+        invalidate_changelist_author_cache()
+
+        with self.login_user_context(self.superuser):
+            response = self.client.get(self.get_admin_url(ContentExpiry, "changelist"))
+
+        self.assertEqual(len(response.context_data["cl"].result_list), 2)
+        self.assertEqual(self._get_page_content_exclusion_lookups(), 1)
+
+    def test_site_filtered_queryset_is_copied_for_each_use(self):
+        request = RequestFactory().get("/")
+        request.user = self.superuser
+        model_admin = admin.site._registry[ContentExpiry]
+
+        queryset = model_admin.get_queryset(request)
+        list(queryset)
+        other_queryset = model_admin.get_queryset(request)
+
+        self.assertIsNot(queryset, other_queryset)
+        self.assertIsNone(other_queryset._result_cache)
+        self.assertEqual(self._get_page_content_exclusion_lookups(), 1)
+
+
+@patch('djangocms_content_expiry.admin.DEFAULT_CONTENT_EXPIRY_CHANGELIST_KEYSET_PAGINATION', True)
+@patch.object(ContentExpiryAdmin, 'list_per_page', 2)
+class ContentExpiryChangelistKeysetPaginationTestCase(CMSTestCase):
+    def setUp(self):
+        expires = timezone.now() + datetime.timedelta(days=5)
+        # Records share expiry dates so the id is needed to order them
+        self.content_expiry_list = [
+            PollContentExpiryFactory(expires=expires + datetime.timedelta(days=index // 2), version__state=PUBLISHED)
+            for index in range(5)
+        ]
+        self.endpoint = self.get_admin_url(ContentExpiry, "changelist")
+
+    def test_pages_follow_expiry_date_and_id_cursors(self):
+        """
+        Following the next page links lists every record once, ordered by expiry date and id
+        """
+        results = []
+        query_counts = []
+        url = self.endpoint
+
+        with self.login_user_context(self.get_superuser()):
+            # Warm up any caches before measuring
+            self.client.get(url)
+            while url:
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                changelist = response.context_data["cl"]
+                results += changelist.result_list
+                query_counts.append(len(queries))
+                url = changelist.next_cursor and self.endpoint + changelist.get_next_page_query_string()
+
+        self.assertEqual(
+            [content_expiry.pk for content_expiry in results],
+            [content_expiry.pk for content_expiry in sorted(
+                self.content_expiry_list, key=lambda content_expiry: (content_expiry.expires, content_expiry.pk)
+            )],
+        )
+        self.assertEqual(changelist.result_count, 5)
+        # Deeper pages don't run more queries than the first page, which has no cursor
+        self.assertEqual(len(query_counts), 3)
+        self.assertEqual(len(set(query_counts[1:])), 1)
+        self.assertLessEqual(query_counts[0], query_counts[1])
+
+    def test_filter_links_start_from_the_first_page(self):
+        with self.login_user_context(self.get_superuser()):
+            response = self.client.get(self.endpoint)
+            next_page_url = self.endpoint + response.context_data["cl"].get_next_page_query_string()
+            response = self.client.get(next_page_url)
+
+        self.assertNotIn("cursor", response.context_data["cl"].get_query_string({"state": DRAFT}))
+        self.assertContains(response, "Next page")
+        self.assertContains(response, "First page")
+
+    def test_invalid_cursor(self):
+        with self.login_user_context(self.get_superuser()):
+            response = self.client.get(self.endpoint + "?cursor=invalid")
+
+        self.assertRedirects(response, self.endpoint + "?e=1", fetch_redirect_response=False)
+
+    @patch('djangocms_content_expiry.admin.DEFAULT_CONTENT_EXPIRY_CHANGELIST_KEYSET_COUNT', False)
+    def test_records_are_not_counted_when_the_count_is_disabled(self):
+        """
+        The records are not counted and the count is not shown, the pages can still be followed
+        """
+        with self.login_user_context(self.get_superuser()):
+            # Warm up any caches before measuring
+            self.client.get(self.endpoint)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(self.endpoint)
+
+        changelist = response.context_data["cl"]
+        self.assertFalse(changelist.result_count_is_known)
+        self.assertEqual(changelist.result_count, 2)
+        self.assertFalse(any("COUNT(" in query["sql"] for query in queries.captured_queries))
+        paginator = BeautifulSoup(response.content, features="lxml").find("p", class_="paginator")
+        self.assertIn("Next page", paginator.text)
+        self.assertNotIn(str(ContentExpiry._meta.verbose_name_plural), paginator.text)
+
+
+class ContentExpiryChangelistQueryPredicateTestCase(CMSTestCase):
+    def setUp(self):
+        expires = timezone.now() + datetime.timedelta(days=5)
+        self.poll_expiry_list = PollContentExpiryFactory.create_batch(3, expires=expires, version__state=PUBLISHED)
+        self.art_expiry_list = ArtProjectContentExpiryFactory.create_batch(2, expires=expires, version__state=PUBLISHED)
+        cms_extension = apps.get_app_config("djangocms_content_expiry").cms_extension
+        self.predicates = cms_extension.expiry_changelist_queryset_predicates
+
+    def _get_changelist_pks(self):
+        with self.login_user_context(self.get_superuser()):
+            response = self.client.get(self.get_admin_url(ContentExpiry, "changelist"))
+        return {content_expiry.pk for content_expiry in response.context_data["cl"].result_list}
+
+    def test_predicates_limit_their_content_model(self):
+        """
+        The records of a content model with a predicate are limited by it, other content models are unaffected
+        """
+        poll_expiry = self.poll_expiry_list[0]
+        art_expiry = self.art_expiry_list[0]
+        art_content_model = art_expiry.version.content_type.model_class()
+        predicates = {
+            PollContent: lambda request: Q(object_id=poll_expiry.version.object_id),
+            art_content_model: lambda request: Q(
+                object_id__in=art_content_model._base_manager.filter(pk=art_expiry.version.object_id).values("pk")
+            ),
+        }
+
+        with patch.dict(self.predicates, {PollContent: predicates[PollContent]}):
+            self.assertEqual(
+                self._get_changelist_pks(),
+                {poll_expiry.pk} | {content_expiry.pk for content_expiry in self.art_expiry_list},
+            )
+
+        with patch.dict(self.predicates, predicates):
+            self.assertEqual(self._get_changelist_pks(), {poll_expiry.pk, art_expiry.pk})
+
 
 class ContentExpiryCsvExportFileTestCase(CMSTestCase):
     def setUp(self):
@@ -440,6 +641,32 @@ class ContentExpiryCsvExportFileTestCase(CMSTestCase):
             response.wsgi_request.build_absolute_uri(art_preview_url)
         )
 
+    @patch('djangocms_content_expiry.admin.DEFAULT_CONTENT_EXPIRY_EXPORT_CHUNK_SIZE', 2)
+    def test_streamed_export_matches_export(self):
+        """
+        The streamed export is read in chunks and should contain the same rows as the standard export
+        """
+        PollContentExpiryFactory.create_batch(3, expires=self.date, version__state=DRAFT)
+        ArtProjectContentExpiryFactory.create_batch(2, expires=self.date, version__state=DRAFT)
+
+        with self.login_user_context(self.get_superuser()):
+            response = self.client.get(self.export_admin_endpoint)
+            with patch('djangocms_content_expiry.admin.DEFAULT_CONTENT_EXPIRY_EXPORT_STREAMING', True):
+                streamed_response = self.client.get(self.export_admin_endpoint)
+
+        self.assertFalse(response.streaming)
+        self.assertTrue(streamed_response.streaming)
+        self.assertEqual(
+            streamed_response.get('Content-Disposition'),
+            "attachment; filename={}.csv".format("djangocms_content_expiry.contentexpiry")
+        )
+
+        streamed_content = b"".join(streamed_response.streaming_content)
+
+        # Header and a row for each of the 5 records
+        self.assertEqual(len(streamed_content.decode().splitlines()), 6)
+        self.assertEqual(streamed_content, response.content)
+
     def test_export_button_is_visible(self):
         """
         Export button should be visible on the frontend changelist
@@ -544,6 +771,27 @@ class ContentExpiryChangelistPageContentSiteTestCase(CMSTestCase):
         self.assertTrue(len(queryset_result), 1)
         self.assertTrue(queryset_result.first().pk, self.page_2_version.contentexpiry.pk)
 
+    def test_subquery_filter_matches_excluded_set_filter(self):
+        """
+        The subquery site filter returns the same records as excluding the other sites PageContents
+        in a single query
+        """
+        request = RequestFactory().get("/")
+        queryset = ContentExpiry.objects.all()
+
+        for site in (self.site_1, self.site_2):
+            with self.subTest(site=site), override_settings(SITE_ID=site.pk):
+                excluded_set_result = content_expiry_site_page_content_excluded_set(queryset, request)
+                predicate = get_content_type_predicate(
+                    {PageContent: content_expiry_site_page_content_predicate}, request
+                )
+
+                with self.assertNumQueries(1):
+                    subquery_result = list(queryset.filter(predicate))
+
+                self.assertEqual(len(subquery_result), 1)
+                self.assertEqual(set(subquery_result), set(excluded_set_result))
+
 
 class DefaultContentExpiryConfigurationAdminViewsFormsTestCase(CMSTestCase):
 
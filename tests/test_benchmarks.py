@@ -0,0 +1,133 @@
+"""
+Benchmarks comparing the performance of alternative implementations, these are
+skipped unless the CONTENT_EXPIRY_BENCHMARKS environment variable is set:
+
+    CONTENT_EXPIRY_BENCHMARKS=1 python setup.py test
+"""
+import os
+import pickle
+import time
+import timeit
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from cms.test_utils.testcases import CMSTestCase
+
+from djangocms_versioning.models import Version
+
+from djangocms_content_expiry.helpers import (
+    encode_id_ranges,
+    get_id_ranges_q,
+    render_url_fragment,
+    reverse_object_url,
+)
+from djangocms_content_expiry.models import ContentExpiry
+from djangocms_content_expiry.test_utils.polls.factories import PollContentFactory
+from djangocms_content_expiry.test_utils.utils import capture_on_commit_callbacks
+
+
+@skipUnless(os.environ.get("CONTENT_EXPIRY_BENCHMARKS"), "Set CONTENT_EXPIRY_BENCHMARKS to run the benchmarks")
+class ContentExpiryExclusionCacheEncodingBenchmark(CMSTestCase):
+    repeat = 50
+
+    def _report(self, name, list_value, encoded_value):
+        def decode_list():
+            ids = pickle.loads(list_value)
+            return {"object_id__in": ids}
+
+        def decode_ranges():
+            return get_id_ranges_q("object_id", pickle.loads(encoded_value))
+
+        list_time = min(timeit.repeat(decode_list, number=1, repeat=self.repeat))
+        ranges_time = min(timeit.repeat(decode_ranges, number=1, repeat=self.repeat))
+        encoding = pickle.loads(encoded_value)[0]
+        print(
+            f"\n{name}: id list {len(list_value)} bytes {list_time * 1000:.3f}ms, "
+            f"{encoding} {len(encoded_value)} bytes {ranges_time * 1000:.3f}ms"
+        )
+
+    def test_exclusion_cache_encoding(self):
+        layouts = {
+            # Pages for each site created in blocks
+            "40000 pages on 4 sites in blocks": [id_ for id_ in range(1, 40001) if (id_ // 500) % 4],
+            # The worst case where the sites pages are created in turn
+            "40000 pages on 4 sites interleaved": [id_ for id_ in range(1, 40001) if id_ % 4],
+            # No two excluded pages are consecutive so the ranges can't be merged
+            "40000 pages on 2 sites interleaved": [id_ for id_ in range(1, 40001) if id_ % 2],
+        }
+
+        for name, ids in layouts.items():
+            self._report(name, pickle.dumps(ids), pickle.dumps(encode_id_ranges(ids)))
+
+
+@skipUnless(os.environ.get("CONTENT_EXPIRY_BENCHMARKS"), "Set CONTENT_EXPIRY_BENCHMARKS to run the benchmarks")
+class ContentExpiryDeferredCreationBenchmark(CMSTestCase):
+    drafts = 200
+
+    def _create_drafts(self, contents):
+        """
+        Create a draft for each content the same way as the edit button, each in its own transaction
+
+        :returns: The time spent in the draft transactions and the time spent once they are committed
+        """
+        user = self.get_superuser()
+        draft_time = 0
+        commit_time = 0
+
+        for content in contents:
+            with capture_on_commit_callbacks() as callbacks:
+                start = time.perf_counter()
+                with transaction.atomic():
+                    Version.objects.create(content=content, created_by=user)
+                draft_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            for callback in callbacks:
+                callback()
+            commit_time += time.perf_counter() - start
+        return draft_time, commit_time
+
+    def test_draft_creation_latency(self):
+        synchronous_contents = PollContentFactory.create_batch(self.drafts + 1)
+        deferred_contents = PollContentFactory.create_batch(self.drafts)
+        # The first draft loads the caches used by both
+        self._create_drafts(synchronous_contents[:1])
+
+        synchronous_times = self._create_drafts(synchronous_contents[1:])
+        with patch('djangocms_content_expiry.handlers.DEFAULT_CONTENT_EXPIRY_DEFERRED_CREATION', True):
+            deferred_times = self._create_drafts(deferred_contents)
+
+        self.assertEqual(ContentExpiry.objects.count(), self.drafts * 2 + 1)
+        for name, (draft_time, commit_time) in (("synchronous", synchronous_times), ("deferred", deferred_times)):
+            print(
+                f"\nDraft creation {name}: {draft_time / self.drafts * 1000:.3f}ms per draft transaction, "
+                f"{commit_time / self.drafts * 1000:.3f}ms per draft on commit"
+            )
+
+
+@skipUnless(os.environ.get("CONTENT_EXPIRY_BENCHMARKS"), "Set CONTENT_EXPIRY_BENCHMARKS to run the benchmarks")
+class ContentExpiryActionIconBenchmark(CMSTestCase):
+    rows = 1000
+    repeat = 5
+    viewname = "admin:djangocms_content_expiry_contentexpiry_change"
+    template_name = "djangocms_content_expiry/admin/icons/edit_action_icon.html"
+
+    def test_action_icon_rendering(self):
+        def render_templates():
+            for pk in range(1, self.rows + 1):
+                render_to_string(self.template_name, {"url": reverse(self.viewname, args=(pk,))})
+
+        def render_fragments():
+            for pk in range(1, self.rows + 1):
+                render_url_fragment(self.template_name, reverse_object_url(self.viewname, pk))
+
+        template_time = min(timeit.repeat(render_templates, number=1, repeat=self.repeat))
+        fragment_time = min(timeit.repeat(render_fragments, number=1, repeat=self.repeat))
+        print(
+            f"\n{self.rows} edit action icons: rendered templates {template_time * 1000:.1f}ms, "
+            f"rendered fragments {fragment_time * 1000:.1f}ms"
+        )
@@ -1,14 +1,22 @@
 import datetime
 from unittest.mock import patch
 
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+
+from cms.api import create_page
 from cms.test_utils.testcases import CMSTestCase
 
 from freezegun import freeze_time
 
 from djangocms_content_expiry.cache import (
+    get_changelist_exclusion_cache_stats,
     get_changelist_page_content_exclusion_cache,
+    invalidate_changelist_page_content_exclusion_cache,
+    reset_changelist_exclusion_cache_stats,
     set_changelist_page_content_exclusion_cache,
 )
+from djangocms_content_expiry.test_utils.utils import capture_on_commit_callbacks
 
 
 class ContentExpiryPageContentCacheMechanismTestCase(CMSTestCase):
@@ -92,3 +100,65 @@ class ContentExpiryPageContentCacheMechanismTestCase(CMSTestCase):
             self.assertNotEqual(site_2_cached_value, site_2_value)
             self.assertEqual(site_1_cached_value, None)
             self.assertEqual(site_2_cached_value, None)
+
+    def test_content_expiry_cache_invalidated_when_page_tree_changes(self):
+        """
+        Changes to the page tree should invalidate the cached entries for every site
+        """
+        site_1_id = 1
+        site_2_id = 2
+        user = self.get_superuser()
+        set_changelist_page_content_exclusion_cache([1, 2], site_1_id)
+        set_changelist_page_content_exclusion_cache([3, 4], site_2_id)
+
+        with capture_on_commit_callbacks() as callbacks:
+            page = create_page(title="home", template="page.html", language="en", created_by=user)
+
+        # The entries are only invalidated once the changes are committed
+        self.assertEqual(get_changelist_page_content_exclusion_cache(site_1_id), [1, 2])
+
+        for callback in callbacks:
+            callback()
+
+        self.assertIsNone(get_changelist_page_content_exclusion_cache(site_1_id))
+        self.assertIsNone(get_changelist_page_content_exclusion_cache(site_2_id))
+
+        set_changelist_page_content_exclusion_cache([1, 2], site_1_id)
+        # Moving a page to another site changes the node
+        with capture_on_commit_callbacks(execute=True):
+            page.node.site = Site.objects.create(id=site_2_id, domain='example-2.com', name='example-2.com')
+            page.node.save()
+
+        self.assertIsNone(get_changelist_page_content_exclusion_cache(site_1_id))
+
+    def test_content_expiry_cache_invalidation_without_cached_entries(self):
+        """
+        Invalidating before anything has been cached should not fail and
+        entries cached afterwards should be available
+        """
+        cache.clear()
+
+        invalidate_changelist_page_content_exclusion_cache()
+        set_changelist_page_content_exclusion_cache([1], 1)
+
+        self.assertEqual(get_changelist_page_content_exclusion_cache(1), [1])
+
+    def test_content_expiry_cache_stats(self):
+        """
+        The cache hits and misses are counted
+        """
+        cache.clear()
+        reset_changelist_exclusion_cache_stats()
+
+        get_changelist_page_content_exclusion_cache(1)
+        set_changelist_page_content_exclusion_cache([1], 1)
+        get_changelist_page_content_exclusion_cache(1)
+        get_changelist_page_content_exclusion_cache(1)
+
+        self.assertEqual(
+            get_changelist_exclusion_cache_stats(),
+            {
+                "page_content": {"hits": 2, "misses": 1},
+                "alias": {"hits": 0, "misses": 0},
+            }
+        )
@@ -2,8 +2,11 @@ from unittest.mock import Mock
 
 from django.apps import apps
 from django.contrib import admin
+from django.db.models import Q
 from django.test import RequestFactory, TestCase
 
+from cms.models import PageContent
+
 from djangocms_moderation.cms_config import ModerationExtension
 from djangocms_moderation.models import ModerationRequestTreeNode
 
@@ -70,15 +73,27 @@ class ContentExpiryChangelistQueryFilterSettingTestCase(TestCase):
         def _another_dummy_fn(site, queryset):
             return queryset
 
+        def _dummy_resolver(content_expiry_list):
+            return []
+
+        def _dummy_predicate(request):
+            return Q()
+
         extension = ContentExpiryExtension()
         app_1_config = Mock(
             djangocms_content_expiry_changelist_queryset_filters=[_dummy_fn],
+            djangocms_content_expiry_preview_url_resolvers={PageContent: _dummy_resolver},
+            djangocms_content_expiry_changelist_queryset_predicates={PageContent: _dummy_predicate},
         )
         extension.configure_app(app_1_config)
         app_2_config = Mock(
             djangocms_content_expiry_changelist_queryset_filters=[_another_dummy_fn],
+            djangocms_content_expiry_preview_url_resolvers={},
+            djangocms_content_expiry_changelist_queryset_predicates={},
         )
         extension.configure_app(app_2_config)
 
         self.assertTrue(_dummy_fn in extension.expiry_changelist_queryset_filters)
         self.assertTrue(_another_dummy_fn in extension.expiry_changelist_queryset_filters)
+        self.assertEqual(extension.expiry_preview_url_resolvers, {PageContent: _dummy_resolver})
+        self.assertEqual(extension.expiry_changelist_queryset_predicates, {PageContent: _dummy_predicate})
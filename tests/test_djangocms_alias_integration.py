@@ -2,15 +2,27 @@ import datetime
 
 from django.contrib.sites.models import Site
 from django.contrib.sites.shortcuts import get_current_site
-from django.test import override_settings
+from django.test import RequestFactory, override_settings
 
 from cms.test_utils.testcases import CMSTestCase
 
 from djangocms_alias.models import Alias as AliasModel, AliasContent, Category
 from djangocms_versioning.models import Version
 
-from djangocms_content_expiry.cms_config import _get_excluded_alias_site_list
+from djangocms_content_expiry.cache import (
+    get_changelist_alias_exclusion_cache,
+    get_changelist_exclusion_cache_stats,
+    reset_changelist_exclusion_cache_stats,
+)
+from djangocms_content_expiry.cms_config import (
+    _get_excluded_alias_site_list,
+    content_expiry_site_alias_excluded_set,
+    content_expiry_site_alias_predicate,
+)
+from djangocms_content_expiry.helpers import decode_id_ranges
 from djangocms_content_expiry.models import ContentExpiry
+from djangocms_content_expiry.test_utils.utils import capture_on_commit_callbacks
+from djangocms_content_expiry.utils import get_content_type_predicate
 
 
 class ContentExpirySiteAliasHelperTestCase(CMSTestCase):
@@ -79,6 +91,62 @@ class ContentExpirySiteAliasHelperTestCase(CMSTestCase):
         self.assertNotIn(self.alias_content_2.pk, alias_exclusion_list)
         self.assertIn(self.alias_content_3.pk, alias_exclusion_list)
 
+    def test_alias_exclusion_list_is_cached(self):
+        """
+        The alias exclusion list is cached for the site and only computed once
+        """
+        request = RequestFactory().get("/")
+        queryset = ContentExpiry.objects.all()
+        reset_changelist_exclusion_cache_stats()
+
+        content_expiry_site_alias_excluded_set(queryset, request)
+
+        self.assertEqual(
+            list(decode_id_ranges(get_changelist_alias_exclusion_cache(self.site_1.pk))),
+            [(self.alias_content_3.pk, self.alias_content_3.pk)],
+        )
+
+        with self.assertNumQueries(0):
+            content_expiry_site_alias_excluded_set(queryset, request)
+
+        # The lookups above and the one made by the assertion
+        self.assertEqual(get_changelist_exclusion_cache_stats()["alias"], {"hits": 2, "misses": 1})
+
+    def test_alias_exclusion_cache_invalidated_when_alias_changes(self):
+        """
+        Saving an Alias or AliasContent should invalidate the cached entries for every site
+        """
+        request = RequestFactory().get("/")
+        queryset = ContentExpiry.objects.all()
+
+        content_expiry_site_alias_excluded_set(queryset, request)
+        # Moving the alias to the other site
+        with capture_on_commit_callbacks() as callbacks:
+            self.alias_content_2.alias.site = self.site_2
+            self.alias_content_2.alias.save()
+
+        # The entries are only invalidated once the change is committed
+        self.assertIsNotNone(get_changelist_alias_exclusion_cache(self.site_1.pk))
+
+        for callback in callbacks:
+            callback()
+
+        self.assertIsNone(get_changelist_alias_exclusion_cache(self.site_1.pk))
+
+        content_expiry_site_alias_excluded_set(queryset, request)
+        with capture_on_commit_callbacks(execute=True):
+            self.alias_content_2.name = "site 2 alias 2"
+            self.alias_content_2.save()
+
+        self.assertIsNone(get_changelist_alias_exclusion_cache(self.site_1.pk))
+
+        content_expiry_site_alias_excluded_set(queryset, request)
+
+        self.assertEqual(
+            list(decode_id_ranges(get_changelist_alias_exclusion_cache(self.site_1.pk))),
+            [(self.alias_content_2.pk, self.alias_content_3.pk)],
+        )
+
     @override_settings(SITE_ID=2)
     def test_helper_alias_exclusion_list_other_site(self):
         """
@@ -191,3 +259,20 @@ class ContentExpiryChangelistAliasContentSiteTestCase(CMSTestCase):
         self.assertEqual(get_current_site(response.request), self.site_2)
         self.assertTrue(len(queryset_result), 1)
         self.assertTrue(queryset_result.first().pk, self.alias_2_version.contentexpiry.pk)
+
+    def test_subquery_filter_matches_excluded_set_filter(self):
+        """
+        The subquery site filter returns the same records as excluding the other sites AliasContents
+        """
+        request = RequestFactory().get("/")
+        queryset = ContentExpiry.objects.all()
+
+        for site in (self.site_1, self.site_2):
+            with self.subTest(site=site), override_settings(SITE_ID=site.pk):
+                excluded_set_result = content_expiry_site_alias_excluded_set(queryset, request)
+                subquery_result = queryset.filter(
+                    get_content_type_predicate({AliasContent: content_expiry_site_alias_predicate}, request)
+                )
+
+                self.assertEqual(subquery_result.count(), 2)
+                self.assertEqual(set(subquery_result), set(excluded_set_result))
@@ -0,0 +1,179 @@
+import datetime
+import shutil
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from cms.test_utils.testcases import CMSTestCase
+
+from djangocms_versioning.constants import DRAFT
+
+from djangocms_content_expiry.constants import (
+    CONTENT_EXPIRY_EXPORT_JOB_COMPLETED,
+    CONTENT_EXPIRY_EXPORT_JOB_FAILED,
+    CONTENT_EXPIRY_EXPORT_JOB_PENDING,
+    CONTENT_EXPIRY_EXPORT_JOB_RUNNER_COMMAND,
+    CONTENT_EXPIRY_EXPORT_JOB_RUNNING,
+)
+from djangocms_content_expiry.exports import _run_export_job_in_thread, run_export_job
+from djangocms_content_expiry.models import ContentExpiry, ContentExpiryExportJob
+from djangocms_content_expiry.test_utils.polls.factories import PollContentExpiryFactory
+
+
+@patch('djangocms_content_expiry.exports.DEFAULT_CONTENT_EXPIRY_EXPORT_JOB_RUNNER',
+       CONTENT_EXPIRY_EXPORT_JOB_RUNNER_COMMAND)
+class ContentExpiryExportJobTestCase(CMSTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        media_override = override_settings(MEDIA_ROOT=self.media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+        self.superuser = self.get_superuser()
+        self.date = timezone.now() + datetime.timedelta(days=5)
+        self.export_endpoint = self.get_admin_url(ContentExpiry, "export_csv") + "?state=_all_"
+        self.export_job_endpoint = self.get_admin_url(ContentExpiry, "export_csv_job") + "?state=_all_"
+
+    def test_export_job_created_with_changelist_filters(self):
+        """
+        Requesting a background export records the changelist filters and redirects to the job
+        """
+        with self.login_user_context(self.superuser):
+            response = self.client.post(self.export_job_endpoint)
+
+        job = ContentExpiryExportJob.objects.get()
+
+        self.assertRedirects(
+            response,
+            self.get_admin_url(ContentExpiryExportJob, "change", job.pk),
+            fetch_redirect_response=False,
+        )
+        self.assertEqual(job.status, CONTENT_EXPIRY_EXPORT_JOB_PENDING)
+        self.assertEqual(job.query_string, "state=_all_")
+        self.assertEqual(job.created_by, self.superuser)
+
+    def test_export_job_not_created_for_get_request(self):
+        """
+        A background export is only started by a POST request
+        """
+        with self.login_user_context(self.superuser):
+            response = self.client.get(self.export_job_endpoint)
+
+        self.assertEqual(response.status_code, 405)
+        self.assertFalse(ContentExpiryExportJob.objects.exists())
+
+    def test_export_job_file_matches_export(self):
+        """
+        The file written by an export job contains the same rows as the csv export
+        """
+        PollContentExpiryFactory.create_batch(3, expires=self.date, version__state=DRAFT)
+
+        with self.login_user_context(self.superuser):
+            export_response = self.client.get(self.export_endpoint)
+            self.client.post(self.export_job_endpoint)
+
+        job = ContentExpiryExportJob.objects.get()
+        run_export_job(job)
+        job.refresh_from_db()
+
+        self.assertEqual(job.status, CONTENT_EXPIRY_EXPORT_JOB_COMPLETED)
+        self.assertEqual(job.rows_processed, 3)
+        self.assertIsNotNone(job.rows_per_second)
+
+        with job.file.open('rb') as export_file:
+            self.assertEqual(export_file.read(), export_response.content)
+
+    def test_export_job_download(self):
+        """
+        A completed export can be downloaded by the user that requested it
+        """
+        PollContentExpiryFactory(expires=self.date, version__state=DRAFT)
+
+        with self.login_user_context(self.superuser):
+            self.client.post(self.export_job_endpoint)
+            job = ContentExpiryExportJob.objects.get()
+            download_endpoint = self.get_admin_url(ContentExpiryExportJob, "download", job.pk)
+
+            # The file is not available until the job is completed
+            pending_response = self.client.get(download_endpoint)
+            run_export_job(job)
+            response = self.client.get(download_endpoint)
+
+        self.assertEqual(pending_response.status_code, 404)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.get('Content-Disposition'),
+            'attachment; filename="{}.csv"'.format("djangocms_content_expiry.contentexpiry")
+        )
+        self.assertEqual(len(b"".join(response.streaming_content).decode().splitlines()), 2)
+
+    def test_run_export_jobs_command(self):
+        """
+        The command runs all of the pending export jobs
+        """
+        PollContentExpiryFactory(expires=self.date, version__state=DRAFT)
+        out = StringIO()
+
+        with self.login_user_context(self.superuser):
+            self.client.post(self.export_job_endpoint)
+            self.client.post(self.export_job_endpoint)
+
+        call_command("run_content_expiry_export_jobs", stdout=out)
+
+        self.assertEqual(
+            ContentExpiryExportJob.objects.filter(status=CONTENT_EXPIRY_EXPORT_JOB_COMPLETED).count(), 2
+        )
+        self.assertIn("exported 1 rows", out.getvalue())
+
+    @patch('djangocms_content_expiry.exports.DEFAULT_CONTENT_EXPIRY_EXPORT_JOB_STALE_TIMEOUT', 60)
+    def test_run_export_jobs_command_runs_stale_jobs(self):
+        """
+        The command runs the jobs that were abandoned while running and leaves the jobs still running
+        """
+        PollContentExpiryFactory(expires=self.date, version__state=DRAFT)
+        out = StringIO()
+
+        with self.login_user_context(self.superuser):
+            self.client.post(self.export_job_endpoint)
+            self.client.post(self.export_job_endpoint)
+
+        stale_job, running_job = ContentExpiryExportJob.objects.order_by("pk")
+        ContentExpiryExportJob.objects.filter(pk=stale_job.pk).update(
+            status=CONTENT_EXPIRY_EXPORT_JOB_RUNNING, started=timezone.now() - datetime.timedelta(seconds=61)
+        )
+        ContentExpiryExportJob.objects.filter(pk=running_job.pk).update(
+            status=CONTENT_EXPIRY_EXPORT_JOB_RUNNING, started=timezone.now() - datetime.timedelta(seconds=30)
+        )
+
+        call_command("run_content_expiry_export_jobs", stdout=out)
+
+        stale_job.refresh_from_db()
+        running_job.refresh_from_db()
+        self.assertEqual(stale_job.status, CONTENT_EXPIRY_EXPORT_JOB_COMPLETED)
+        self.assertEqual(stale_job.rows_processed, 1)
+        self.assertEqual(running_job.status, CONTENT_EXPIRY_EXPORT_JOB_RUNNING)
+        self.assertIn("Queued 1 stale export jobs to be run again", out.getvalue())
+
+    @patch('djangocms_content_expiry.exports.connection')
+    def test_export_job_error_logged_in_thread(self, mocked_connection):
+        """
+        An export job run in a worker thread logs its error as nothing reads the result of the job
+        """
+        with self.login_user_context(self.superuser):
+            self.client.post(self.export_job_endpoint)
+        job = ContentExpiryExportJob.objects.get()
+
+        with patch('djangocms_content_expiry.exports._build_export_request', side_effect=ValueError("Broken")), \
+                self.assertLogs('djangocms_content_expiry.exports', level='ERROR') as logs:
+            _run_export_job_in_thread(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, CONTENT_EXPIRY_EXPORT_JOB_FAILED)
+        self.assertIn(f"Content expiry export job {job.pk} failed", logs.output[0])
+        self.assertIn("ValueError: Broken", logs.output[0])
+        mocked_connection.close.assert_called_once_with()
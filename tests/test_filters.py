@@ -3,6 +3,8 @@ from unittest import skip
 from unittest.mock import patch
 
 from django.contrib import admin
+from django.contrib.auth.models import update_last_login
+from django.test import RequestFactory
 
 from cms.test_utils.testcases import CMSTestCase
 
@@ -10,7 +12,7 @@ from djangocms_versioning.constants import ARCHIVED, DRAFT, PUBLISHED, UNPUBLISH
 from freezegun import freeze_time
 
 from djangocms_content_expiry.admin import ContentExpiryAdmin
-from djangocms_content_expiry.filters import ContentTypeFilter
+from djangocms_content_expiry.filters import AuthorFilter, ContentTypeFilter
 from djangocms_content_expiry.forms import ForeignKeyReadOnlyWidget
 from djangocms_content_expiry.models import (
     ContentExpiry,
@@ -26,7 +28,10 @@ from djangocms_content_expiry.test_utils.polymorphic_project.factories import (
     ProjectContentExpiryFactory,
     ResearchProjectContentExpiryFactory,
 )
-from djangocms_content_expiry.test_utils.utils import _get_content_types_set
+from djangocms_content_expiry.test_utils.utils import (
+    _get_content_types_set,
+    capture_on_commit_callbacks,
+)
 
 
 class ContentExpiryChangelistExpiryFilterTestCase(CMSTestCase):
@@ -163,7 +168,7 @@ class ContentExpiryAuthorFilterTestCase(CMSTestCase):
         date = datetime.datetime.now() + datetime.timedelta(days=5)
         # Create records with a set user
         user = UserFactory()
-        expiry_author = PollContentExpiryFactory.create_batch(2, expires=date, created_by=user,
+        expiry_author = PollContentExpiryFactory.create_batch(2, expires=date, version__created_by=user,
                                                               version__state=PUBLISHED)
 
         # Create records with other random users
@@ -198,6 +203,65 @@ class ContentExpiryAuthorFilterTestCase(CMSTestCase):
             ordered=False,
         )
 
+    def _get_author_option(self, user):
+        return str(user.pk), user.get_full_name() or user.get_username()
+
+    def _get_author_lookups(self, request):
+        model_admin = admin.site._registry[ContentExpiry]
+        return AuthorFilter(request, {}, ContentExpiry, model_admin).lookup_choices
+
+    def test_author_filter_lookups_are_cached(self):
+        """
+        The authors are only read from the database when the records or users change
+        """
+        request = RequestFactory().get("/")
+        request.user = self.get_superuser()
+        content_expiry = PollContentExpiryFactory(version__state=PUBLISHED)
+        author = content_expiry.version.created_by
+
+        self.assertEqual(self._get_author_lookups(request), [self._get_author_option(author)])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self._get_author_lookups(request), [self._get_author_option(author)])
+
+        # A new record invalidates the cached authors
+        with capture_on_commit_callbacks(execute=True):
+            other_author = PollContentExpiryFactory(version__state=PUBLISHED).version.created_by
+
+        self.assertCountEqual(
+            self._get_author_lookups(request),
+            [self._get_author_option(author), self._get_author_option(other_author)],
+        )
+
+        # A change to an author's name invalidates the cached authors
+        with capture_on_commit_callbacks(execute=True):
+            author.first_name = "Expiry"
+            author.last_name = "Author"
+            author.save()
+
+        self.assertIn((str(author.pk), "Expiry Author"), self._get_author_lookups(request))
+
+    def test_author_filter_lookups_are_kept_when_authors_are_unchanged(self):
+        """
+        Saves that don't change the authors or their names keep the cached authors
+        """
+        request = RequestFactory().get("/")
+        request.user = self.get_superuser()
+        content_expiry = PollContentExpiryFactory(version__state=PUBLISHED)
+        author = content_expiry.version.created_by
+        self._get_author_lookups(request)
+
+        with capture_on_commit_callbacks(execute=True) as callbacks:
+            # A login only updates the last login date of the user
+            update_last_login(None, author)
+            UserFactory()
+            content_expiry.expires = content_expiry.expires + datetime.timedelta(days=1)
+            content_expiry.save()
+
+        self.assertEqual(callbacks, [])
+        with self.assertNumQueries(0):
+            self.assertEqual(self._get_author_lookups(request), [self._get_author_option(author)])
+
 
 class ContentExpiryContentTypeFilterTestCase(CMSTestCase):
 
@@ -562,7 +626,7 @@ class ContentExpiryCsvExportFilterSettingsTestCase(CMSTestCase):
         user_2 = version_2.version.created_by
 
         # Filter by a user_1
-        author_selection = f"?created_by={version_1.pk}"
+        author_selection = f"?created_by={user_1.pk}"
 
         with self.login_user_context(self.get_superuser()):
             response = self.client.get(self.admin_endpoint + author_selection)
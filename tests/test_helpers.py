@@ -1,11 +1,30 @@
+import pickle
 from datetime import datetime
 from unittest.mock import patch
 
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.urls import get_script_prefix, reverse, set_script_prefix
+from django.utils import timezone, translation
+
 from cms.test_utils.testcases import CMSTestCase
 
 from freezegun import freeze_time
 
-from djangocms_content_expiry.helpers import get_rangefilter_expires_default
+from djangocms_content_expiry.helpers import (
+    ID_DELTAS,
+    ID_RANGES,
+    MAX_CACHED_URLS,
+    _get_reversed_url,
+    decode_id_ranges,
+    decode_keyset_cursor,
+    encode_id_ranges,
+    encode_keyset_cursor,
+    get_id_ranges_q,
+    get_rangefilter_expires_default,
+    render_url_fragment,
+    reverse_object_url,
+)
 
 
 class ContentExpiryDefaultRangeHelperTestCase(CMSTestCase):
@@ -22,3 +41,124 @@ class ContentExpiryDefaultRangeHelperTestCase(CMSTestCase):
 
         self.assertEqual(start, datetime(2100, 10, 10, 0, 0))
         self.assertEqual(end, datetime(2100, 10, 15, 0, 0))
+
+
+class ContentExpiryIdRangesHelperTestCase(CMSTestCase):
+
+    def test_ids_are_encoded_as_sorted_merged_ranges(self):
+        encoding, ranges = encode_id_ranges([9, 3, 1, 2, 3, 7, 8, 12])
+
+        self.assertEqual(encoding, ID_RANGES)
+        self.assertEqual(list(ranges), [1, 3, 7, 9, 12, 12])
+        self.assertEqual(list(decode_id_ranges((encoding, ranges))), [(1, 3), (7, 9), (12, 12)])
+
+    def test_empty_ids_are_encoded(self):
+        ranges = encode_id_ranges([])
+
+        self.assertEqual(list(decode_id_ranges(ranges)), [])
+
+    def test_large_ids_are_encoded(self):
+        encoded_ids = encode_id_ranges([1, 2 ** 40])
+
+        self.assertEqual(list(decode_id_ranges(encoded_ids)), [(1, 1), (2 ** 40, 2 ** 40)])
+
+    def test_encoded_ids_are_smaller_than_the_id_list(self):
+        """
+        The ids of 40000 pages spread over 4 sites in blocks are cached in a fraction of the size
+        """
+        ids = [id_ for id_ in range(1, 40001) if (id_ // 500) % 4]
+
+        list_size = len(pickle.dumps(ids))
+        ranges_size = len(pickle.dumps(encode_id_ranges(ids)))
+
+        self.assertLess(ranges_size * 100, list_size)
+
+    def test_interleaved_ids_are_encoded_as_gaps(self):
+        """
+        The ids of pages created on 4 sites in turn don't make fewer ranges, the gaps between
+        them are cached instead
+        """
+        ids = [id_ for id_ in range(1, 40001) if id_ % 4]
+
+        encoding, deltas = encode_id_ranges(ids)
+
+        self.assertEqual(encoding, ID_DELTAS)
+        self.assertEqual(deltas.itemsize, 1)
+        self.assertEqual(
+            list(decode_id_ranges((encoding, deltas))), [(id_, id_ + 2) for id_ in range(1, 40001, 4)]
+        )
+        self.assertEqual(get_id_ranges_q("object_id", (encoding, deltas)), Q(object_id__in=ids))
+        self.assertLess(len(pickle.dumps((encoding, deltas))) * 2, len(pickle.dumps(ids)))
+
+    @patch('djangocms_content_expiry.helpers.MAX_ID_RANGE_LOOKUPS', 1)
+    def test_ranges_are_expanded_to_range_and_in_lookups(self):
+        """
+        The longest ranges use a range lookup, short ranges and ranges over the limit are listed
+        """
+        ranges = encode_id_ranges([1, 2, 3, 5, 6, 10, 20, 21, 22, 23])
+
+        query = get_id_ranges_q("object_id", ranges)
+
+        self.assertEqual(
+            query,
+            Q(object_id__in=[1, 2, 3, 5, 6, 10]) | Q(object_id__range=(20, 23))
+        )
+
+
+class ContentExpiryKeysetCursorHelperTestCase(CMSTestCase):
+
+    def test_cursor_is_decoded_to_the_expiry_date_and_id(self):
+        expires = timezone.now()
+
+        self.assertEqual(decode_keyset_cursor(encode_keyset_cursor(expires, 12)), (expires, 12))
+
+    def test_invalid_cursor_raises_value_error(self):
+        for cursor in ("", "12", "2022-01-01T00:00:00_", "not-a-date_12"):
+            with self.subTest(cursor=cursor), self.assertRaises(ValueError):
+                decode_keyset_cursor(cursor)
+
+
+class ContentExpiryUrlFragmentHelperTestCase(CMSTestCase):
+
+    def test_url_fragment_matches_rendered_template(self):
+        """
+        The fragment rendered once gives the same html as rendering the template for each url
+        """
+        template_name = "djangocms_content_expiry/admin/icons/preview_action_icon.html"
+
+        for url in ("/en/poll/1/", "/admin/?a=1&b=\"2\"<script>"):
+            with self.subTest(url=url):
+                self.assertEqual(
+                    render_url_fragment(template_name, url), render_to_string(template_name, {"url": url})
+                )
+
+    def test_object_url_matches_reversed_url(self):
+        viewname = "admin:djangocms_content_expiry_contentexpiry_change"
+
+        for pk in (1, 25, 1234567):
+            with self.subTest(pk=pk):
+                self.assertEqual(reverse_object_url(viewname, pk), reverse(viewname, args=(pk,)))
+
+    def test_object_url_is_reversed_for_the_active_language(self):
+        """
+        The url reversed under one language is not reused when another language is active
+        """
+        viewname = "admin:djangocms_content_expiry_contentexpiry_change"
+
+        for language in ("en", "de", "en"):
+            with self.subTest(language=language), translation.override(language):
+                self.assertEqual(reverse_object_url(viewname, 1), reverse(viewname, args=(1,)))
+
+    def test_object_urls_cached_are_bounded(self):
+        """
+        The urls reversed for every script prefix used are not all kept by the process
+        """
+        viewname = "admin:djangocms_content_expiry_contentexpiry_change"
+        script_prefix = get_script_prefix()
+        self.addCleanup(set_script_prefix, script_prefix)
+
+        for index in range(MAX_CACHED_URLS + 10):
+            set_script_prefix(f"/site-{index}/")
+            self.assertEqual(reverse_object_url(viewname, 1), reverse(viewname, args=(1,)))
+
+        self.assertEqual(_get_reversed_url.cache_info().currsize, MAX_CACHED_URLS)
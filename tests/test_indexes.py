@@ -0,0 +1,61 @@
+import datetime
+from unittest import skipUnless
+
+from django.db import connection
+from django.utils import timezone
+
+from cms.test_utils.testcases import CMSTestCase
+
+from djangocms_versioning.constants import PUBLISHED
+
+from djangocms_content_expiry.models import ContentExpiry
+from djangocms_content_expiry.test_utils.polls.factories import PollContentExpiryFactory
+
+
+@skipUnless(connection.vendor in ("sqlite", "postgresql"), "Query plans are only checked for SQLite and PostgreSQL")
+class ContentExpiryChangelistIndexUsageTestCase(CMSTestCase):
+    """
+    Ensure that the queries run by the changelist can be answered using the indexes
+    defined on the ContentExpiry model.
+    """
+    def setUp(self):
+        self.content_expiry = PollContentExpiryFactory(version__state=PUBLISHED)
+        self.date_range = (timezone.now(), timezone.now() + datetime.timedelta(days=30))
+
+    def _get_query_plan(self, queryset):
+        """
+        Explain the queryset, the test tables are tiny so PostgreSQL is told to avoid
+        sequential scans otherwise it would never choose an index.
+        """
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.order_by("-pk").explain()
+
+    def test_default_changelist_query_uses_state_expiry_index(self):
+        """
+        The default changelist filters published versions within the default date range
+        """
+        queryset = ContentExpiry.objects.filter(state=PUBLISHED, expires__range=self.date_range)
+
+        self.assertIn("contentexpiry_state_expiry_idx", self._get_query_plan(queryset))
+
+    def test_expiry_date_range_query_uses_expires_index(self):
+        """
+        Showing all version states only filters by the expiry date range
+        """
+        queryset = ContentExpiry.objects.filter(expires__range=self.date_range)
+
+        self.assertIn("contentexpiry_expires_idx", self._get_query_plan(queryset))
+
+    def test_compliance_number_query_uses_compliance_index(self):
+        queryset = ContentExpiry.objects.filter(compliance_number=self.content_expiry.compliance_number)
+
+        self.assertIn("contentexpiry_compliance_idx", self._get_query_plan(queryset))
+
+    def test_author_query_uses_author_expiry_index(self):
+        queryset = ContentExpiry.objects.filter(
+            version_author=self.content_expiry.version_author, expires__range=self.date_range
+        )
+
+        self.assertIn("contentexpiry_author_exp_idx", self._get_query_plan(queryset))
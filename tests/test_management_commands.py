@@ -1,6 +1,13 @@
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import Future
 from datetime import datetime
 from io import StringIO
+from unittest.mock import patch
 
+from django.contrib.contenttypes.models import ContentType
 from django.core.management import call_command
 from django.core.management.base import CommandError
 from django.test import TestCase
@@ -12,11 +19,22 @@ import factory
 from djangocms_versioning.models import Version
 from djangocms_versioning.signals import post_version_operation, pre_version_operation
 
+from djangocms_content_expiry.cache import invalidate_default_duration_cache
+from djangocms_content_expiry.management.commands.create_existing_versions_expiry_records import (
+    Command as CreateExpiryRecordsCommand,
+)
+from djangocms_content_expiry.models import ContentExpiry
+from djangocms_content_expiry.test_utils.factories import (
+    DefaultContentExpiryConfigurationFactory,
+)
 from djangocms_content_expiry.test_utils.polls.factories import PollVersionFactory
 from djangocms_content_expiry.test_utils.polymorphic_project.factories import (
     ProjectContentVersionFactory,
 )
-from djangocms_content_expiry.utils import get_default_duration_for_version
+from djangocms_content_expiry.utils import (
+    get_cached_default_duration_map,
+    get_default_duration_for_version,
+)
 
 
 class CreateExpiryRecordsDefaultLogicTestCase(TestCase):
@@ -180,3 +198,238 @@ class CreateExpiryRecordsDateOverrideLogicTestCase(CMSTestCase):
             expected_date = timezone.make_aware(expected_date)
 
             self.assertEqual(version.contentexpiry.expires, expected_date)
+
+
+class InProcessExecutor:
+    """
+    Runs the work given to a process pool straight away in the test process, the test
+    database can't be seen by other processes
+    """
+    def __init__(self, max_workers, mp_context):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+class CreateExpiryRecordsBulkLogicTestCase(CMSTestCase):
+
+    @factory.django.mute_signals(pre_version_operation, post_version_operation)
+    def setUp(self):
+        # The durations loaded during the test are rolled back without a commit to reload them
+        self.addCleanup(invalidate_default_duration_cache)
+        self.out = StringIO()
+        self.checkpoint_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.checkpoint_dir)
+        self.checkpoint_file = os.path.join(self.checkpoint_dir, "checkpoint.json")
+
+        self.poll_content_versions = PollVersionFactory.create_batch(5, content__language="en")
+        self.project_content_versions = ProjectContentVersionFactory.create_batch(5)
+
+    def test_bulk_logic(self):
+        """
+        The bulk mode creates the same expiry records as the default logic
+        """
+        DefaultContentExpiryConfigurationFactory(
+            content_type=ContentType.objects.get_for_model(self.poll_content_versions[0].content),
+            duration=2,
+        )
+
+        call_command(
+            "create_existing_versions_expiry_records",
+            bulk=True,
+            batch_size=3,
+            stdout=self.out,
+        )
+
+        versions = Version.objects.all()
+
+        self.assertEqual(ContentExpiry.objects.count(), 10)
+
+        for version in versions:
+            expected_date = version.modified + get_default_duration_for_version(version)
+
+            self.assertEqual(version.contentexpiry.expires, expected_date)
+            self.assertEqual(version.contentexpiry.created_by, version.created_by)
+            self.assertEqual(version.contentexpiry.state, version.state)
+            self.assertEqual(version.contentexpiry.content_type_id, version.content_type_id)
+            self.assertEqual(version.contentexpiry.object_id, version.object_id)
+
+        self.assertIn("Processed versions up to: {}, 10 Content Expiry records created".format(
+            versions.order_by("pk").last().pk
+        ), self.out.getvalue())
+
+    def test_bulk_logic_skips_versions_without_content(self):
+        """
+        A version that has no content object attached is skipped
+        """
+        version = self.poll_content_versions[0]
+        Version.objects.filter(pk=version.pk).update(object_id=version.object_id + 1000)
+
+        call_command(
+            "create_existing_versions_expiry_records",
+            bulk=True,
+            stdout=self.out,
+        )
+
+        self.assertEqual(ContentExpiry.objects.count(), 9)
+        self.assertFalse(ContentExpiry.objects.filter(version=version).exists())
+        self.assertIn(f"No content found for version: {version.pk}", self.out.getvalue())
+
+    def test_bulk_logic_counts_the_records_inserted(self):
+        """
+        A record created for a version while its batch is processed is left as it is and not counted
+        """
+        version = self.poll_content_versions[0]
+        get_existing_content_keys = CreateExpiryRecordsCommand._get_existing_content_keys
+
+        def create_record_during_batch(command, versions):
+            if not ContentExpiry.objects.filter(version=version).exists():
+                ContentExpiry.objects.create(version=version, created_by=version.created_by, expires=timezone.now())
+            return get_existing_content_keys(command, versions)
+
+        with patch.object(CreateExpiryRecordsCommand, "_get_existing_content_keys", create_record_during_batch):
+            call_command(
+                "create_existing_versions_expiry_records",
+                bulk=True,
+                stdout=self.out,
+            )
+
+        self.assertEqual(ContentExpiry.objects.count(), 10)
+        self.assertIn("Created 9 Content Expiry records", self.out.getvalue())
+
+    def test_bulk_logic_resumes_from_checkpoint(self):
+        """
+        An interrupted run is resumed after the last version recorded in the checkpoint,
+        the checkpoint is removed once the run is complete
+        """
+        versions = Version.objects.order_by("pk")
+        last_version_pk = versions[4].pk
+        with open(self.checkpoint_file, "w") as checkpoint:
+            json.dump({"last_version_pk": last_version_pk}, checkpoint)
+
+        call_command(
+            "create_existing_versions_expiry_records",
+            bulk=True,
+            batch_size=2,
+            checkpoint_file=self.checkpoint_file,
+            stdout=self.out,
+        )
+
+        self.assertFalse(ContentExpiry.objects.filter(version__pk__lte=last_version_pk).exists())
+        self.assertEqual(ContentExpiry.objects.filter(version__pk__gt=last_version_pk).count(), 5)
+        self.assertIn(f"Resuming from checkpoint after version: {last_version_pk}", self.out.getvalue())
+        self.assertFalse(os.path.exists(self.checkpoint_file))
+
+    def test_bulk_logic_queries_per_batch(self):
+        """
+        The queries made for a batch don't depend on the number of versions in the batch
+        """
+        # The durations are loaded once by the process
+        get_cached_default_duration_map()
+
+        # The versions, a content query per content type, the insert with its savepoint and
+        # the records that already exist before it, and the query that finds there are no
+        # more versions
+        with self.assertNumQueries(8):
+            call_command(
+                "create_existing_versions_expiry_records",
+                bulk=True,
+                stdout=self.out,
+            )
+
+    def test_bulk_logic_version_pk_ranges(self):
+        """
+        The versions are split into disjoint pk ranges of a batch of versions that cover every version
+        """
+        version_pks = list(Version.objects.order_by("pk").values_list("pk", flat=True))
+
+        version_pk_ranges = CreateExpiryRecordsCommand()._get_version_pk_ranges(4)
+
+        self.assertEqual(
+            version_pk_ranges,
+            [(version_pks[0], version_pks[3]), (version_pks[4], version_pks[7]), (version_pks[8], version_pks[9])],
+        )
+
+    def test_bulk_logic_version_pk_range(self):
+        """
+        Only the versions in the range given to a worker are processed
+        """
+        version_pks = list(Version.objects.order_by("pk").values_list("pk", flat=True))
+        command = CreateExpiryRecordsCommand(stdout=self.out)
+
+        created_count, missing_content_version_pks = (
+            command._populate_existing_version_content_expiry_records_in_bulk(
+                None, 2, version_pk_range=(version_pks[2], version_pks[6])
+            )
+        )
+
+        self.assertEqual((created_count, missing_content_version_pks), (5, []))
+        self.assertCountEqual(
+            ContentExpiry.objects.values_list("version_id", flat=True), version_pks[2:7]
+        )
+
+    def test_bulk_logic_workers_with_checkpoint(self):
+        """
+        A checkpoint can't be used to resume a run with several workers
+        """
+        with self.assertRaisesMessage(CommandError, "A checkpoint_file can't be used with more than 1 worker"):
+            call_command(
+                "create_existing_versions_expiry_records",
+                bulk=True,
+                workers=2,
+                checkpoint_file=self.checkpoint_file,
+                stdout=self.out,
+            )
+
+    @patch(
+        "djangocms_content_expiry.management.commands.create_existing_versions_expiry_records.ProcessPoolExecutor",
+        InProcessExecutor,
+    )
+    def test_bulk_logic_workers(self):
+        """
+        The batches run by the workers create every record, the versions without content and the
+        progress of each batch are reported
+        """
+        version = self.poll_content_versions[0]
+        Version.objects.filter(pk=version.pk).update(object_id=version.object_id + 1000)
+
+        call_command(
+            "create_existing_versions_expiry_records",
+            bulk=True,
+            batch_size=4,
+            workers=2,
+            stdout=self.out,
+        )
+
+        self.assertEqual(ContentExpiry.objects.count(), 9)
+        self.assertFalse(ContentExpiry.objects.filter(version=version).exists())
+        self.assertIn(f"No content found for version: {version.pk}", self.out.getvalue())
+        self.assertIn("batch 1 of 3", self.out.getvalue())
+        self.assertIn("batch 3 of 3, 9 Content Expiry records created", self.out.getvalue())
+        self.assertIn(
+            "Created 9 Content Expiry records, skipped 1 versions with no content", self.out.getvalue()
+        )
+
+    @patch("multiprocessing.get_context", side_effect=ValueError("cannot find context for 'fork'"))
+    def test_bulk_logic_workers_without_fork(self, mocked_get_context):
+        """
+        Several workers can't be used where the worker processes can't be forked
+        """
+        with self.assertRaisesMessage(CommandError, "More than 1 worker requires the fork start method"):
+            call_command(
+                "create_existing_versions_expiry_records",
+                bulk=True,
+                workers=2,
+                stdout=self.out,
+            )
+
+        self.assertFalse(ContentExpiry.objects.exists())
@@ -1,8 +1,10 @@
 import datetime
 
 from django.contrib import admin
+from django.db import connection
 from django.template.loader import render_to_string
 from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from cms.test_utils.testcases import CMSTestCase
@@ -249,3 +251,108 @@ class ContentExpiryMonkeyPatchTestCase(CMSTestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, additional_settings_control, html=True)
+
+    def test_extended_versioning_admin_changelist_expiry_queries_do_not_grow_with_rows(self):
+        """
+        The compliance number column and the additional content settings icon are read
+        by the changelist query rather than a query for every version
+        """
+        poll = self.content_expiry_primary.version.content.poll
+        url = self.get_admin_url(self.versionable.version_model_proxy, "changelist") + f"?poll={poll.pk}"
+
+        def _get_content_expiry_queries(captured_queries):
+            return [
+                query for query in captured_queries.captured_queries
+                if ContentExpiry._meta.db_table in query["sql"]
+            ]
+
+        with CaptureQueriesContext(connection) as single_version_queries:
+            response = self.client.get(url)
+
+        self.assertContains(response, self.content_expiry_primary.compliance_number)
+
+        for _ in range(3):
+            factories.PollContentExpiryFactory(version__content__poll=poll, version__state=PUBLISHED)
+
+        with CaptureQueriesContext(connection) as many_version_queries:
+            response = self.client.get(url)
+
+        self.assertEqual(len(response.context_data["cl"].result_list), 4)
+        self.assertEqual(
+            len(_get_content_expiry_queries(single_version_queries)),
+            len(_get_content_expiry_queries(many_version_queries)),
+        )
+
+    def test_extended_moderation_admin_changelist_expiry_queries_do_not_grow_with_rows(self):
+        """
+        The content expiry records shown by the moderation request changelist are prefetched
+        rather than queried for every moderation request
+        """
+        url = reverse("admin:djangocms_moderation_moderationrequesttreenode_changelist")
+        url = f"{url}?moderation_request__collection__id={self.collection.pk}"
+
+        def _get_content_expiry_queries(captured_queries):
+            return [
+                query for query in captured_queries.captured_queries
+                if ContentExpiry._meta.db_table in query["sql"]
+            ]
+
+        with CaptureQueriesContext(connection) as single_request_queries:
+            response = self.client.get(url)
+
+        self.assertContains(
+            response, self.get_admin_url(ContentExpiry, "change", self.content_expiry_primary.pk)
+        )
+
+        for _ in range(3):
+            moderation_request = ModerationRequestFactory(
+                collection=self.collection,
+                version=factories.PollContentExpiryFactory(version__state=PUBLISHED).version,
+            )
+            RootModerationRequestTreeNodeFactory(moderation_request=moderation_request)
+
+        with CaptureQueriesContext(connection) as many_request_queries:
+            response = self.client.get(url)
+
+        self.assertEqual(len(response.context_data["cl"].result_list), 4)
+        self.assertEqual(
+            len(_get_content_expiry_queries(single_request_queries)),
+            len(_get_content_expiry_queries(many_request_queries)),
+        )
+
+    def test_extended_moderation_admin_copy_queries_do_not_grow_with_collection(self):
+        """
+        Copying a content expiry updates and creates the records of a collection in bulk
+        """
+        def _add_moderation_requests(expiry_records, missing_records):
+            for _ in range(expiry_records):
+                moderation_request = ModerationRequestFactory(
+                    collection=self.collection,
+                    version=factories.PollContentExpiryFactory(version__state=PUBLISHED).version,
+                )
+                RootModerationRequestTreeNodeFactory(moderation_request=moderation_request)
+            for _ in range(missing_records):
+                poll_content = factories.PollContentWithVersionFactory()
+                version = poll_content.versions.last()
+                version.contentexpiry.delete()
+                moderation_request = ModerationRequestFactory(collection=self.collection, version=version)
+                RootModerationRequestTreeNodeFactory(moderation_request=moderation_request)
+
+        _add_moderation_requests(1, 1)
+        # Warm the caches filled by the first request
+        self.client.post(self.url)
+        ContentExpiry.objects.filter(expires=self.expires_primary).exclude(
+            pk=self.content_expiry_primary.pk
+        ).last().delete()
+        with CaptureQueriesContext(connection) as small_collection_queries:
+            self.client.post(self.url)
+
+        ContentExpiry.objects.exclude(pk=self.content_expiry_primary.pk).delete()
+        _add_moderation_requests(5, 5)
+        with CaptureQueriesContext(connection) as large_collection_queries:
+            response = self.client.post(self.url)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(small_collection_queries), len(large_collection_queries))
+        self.assertEqual(ContentExpiry.objects.count(), 1 + 2 + 10)
+        self.assertEqual(ContentExpiry.objects.exclude(expires=self.expires_primary).count(), 0)
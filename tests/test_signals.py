@@ -1,3 +1,9 @@
+import datetime
+from unittest.mock import patch
+
+from django.db import transaction
+from django.utils import timezone
+
 from cms.api import create_page
 from cms.test_utils.testcases import CMSTestCase
 from cms.test_utils.util.context_managers import signal_tester
@@ -5,11 +11,14 @@ from cms.test_utils.util.context_managers import signal_tester
 from djangocms_versioning import constants, signals
 from djangocms_versioning.models import Version
 
+from djangocms_content_expiry.handlers import batch_content_expiry
 from djangocms_content_expiry.models import ContentExpiry
 from djangocms_content_expiry.test_utils.polls.factories import (
     PollFactory,
     PollVersionFactory,
 )
+from djangocms_content_expiry.test_utils.utils import capture_on_commit_callbacks
+from djangocms_content_expiry.utils import get_future_expire_date
 
 
 class ContentExpirySignalTestCase(CMSTestCase):
@@ -68,3 +77,196 @@ class ContentExpirySignalTestCase(CMSTestCase):
             )
             self.assertEqual(signal["operation"], constants.OPERATION_DRAFT)
             self.assertEqual(signal["obj"], version)
+
+    def test_content_expiry_version_fields_kept_in_sync(self):
+        """
+        The version fields copied onto the content expiry record should follow
+        the version when its state changes.
+        """
+        user = self.get_superuser()
+        page = create_page(
+            title="home",
+            template="page.html",
+            language="en",
+            created_by=user
+        )
+        version = Version.objects.filter_by_grouper(page).get()
+        expiry_record = ContentExpiry.objects.get(version=version)
+
+        self.assertEqual(expiry_record.content_type_id, version.content_type_id)
+        self.assertEqual(expiry_record.object_id, version.object_id)
+        self.assertEqual(expiry_record.version_author_id, version.created_by_id)
+        self.assertEqual(expiry_record.state, constants.DRAFT)
+
+        version.publish(user)
+        expiry_record.refresh_from_db()
+
+        self.assertEqual(expiry_record.state, constants.PUBLISHED)
+
+        version.unpublish(user)
+        expiry_record.refresh_from_db()
+
+        self.assertEqual(expiry_record.state, constants.UNPUBLISHED)
+
+    def test_content_expiry_update_doesnt_load_version(self):
+        """
+        Saving an existing content expiry record leaves the version fields to the signal
+        handlers and doesn't load the version
+        """
+        version = PollVersionFactory(state=constants.DRAFT)
+        expiry_record = ContentExpiry.objects.get(version=version)
+        expiry_record.expires = timezone.now()
+        expiry_record.state = constants.ARCHIVED
+
+        with self.assertNumQueries(1):
+            expiry_record.save(update_fields=["expires"])
+
+        expiry_record.refresh_from_db()
+        self.assertEqual(expiry_record.state, constants.DRAFT)
+
+        # The version fields are copied again when they are saved explicitly
+        expiry_record.state = constants.ARCHIVED
+        expiry_record.save(update_fields=["state"])
+        expiry_record.refresh_from_db()
+        self.assertEqual(expiry_record.state, constants.DRAFT)
+
+
+@patch('djangocms_content_expiry.handlers.DEFAULT_CONTENT_EXPIRY_DEFERRED_CREATION', True)
+class ContentExpiryDeferredCreationTestCase(CMSTestCase):
+    def test_content_expiry_created_on_commit(self):
+        """
+        The content expiry records for the drafts created in a transaction are created
+        together once it is committed
+        """
+        with capture_on_commit_callbacks(execute=True) as callbacks:
+            versions = PollVersionFactory.create_batch(3, state=constants.DRAFT)
+
+            self.assertFalse(ContentExpiry.objects.filter(version__in=versions).exists())
+
+        # A callback for each draft, the first creates the records for every draft and
+        # registers the author cache invalidation
+        self.assertEqual(len(callbacks), 4)
+        for version in versions:
+            self.assertEqual(version.contentexpiry.expires, get_future_expire_date(version, version.created))
+            self.assertEqual(version.contentexpiry.created_by, version.created_by)
+            self.assertEqual(version.contentexpiry.state, version.state)
+
+    def test_content_expiry_created_on_commit_queries(self):
+        """
+        The number of queries made to create the records doesn't depend on the number of drafts
+        """
+        with capture_on_commit_callbacks() as callbacks:
+            PollVersionFactory.create_batch(5, state=constants.DRAFT)
+
+        # The versions, the source version expiry records and the insert
+        with self.assertNumQueries(3):
+            callbacks[0]()
+        # The callbacks of the other drafts have nothing left to create
+        with self.assertNumQueries(0):
+            for callback in callbacks[1:]:
+                callback()
+
+        self.assertEqual(ContentExpiry.objects.count(), 5)
+
+    def test_content_expiry_source_expiry_date_copied(self):
+        """
+        A draft created from another version uses the expiry date of the source version,
+        including a source version created in the same transaction
+        """
+        source_expiry_date = timezone.now() + datetime.timedelta(days=5)
+
+        with capture_on_commit_callbacks(execute=True):
+            source_version = PollVersionFactory(state=constants.DRAFT)
+
+        ContentExpiry.objects.filter(version=source_version).update(expires=source_expiry_date)
+
+        with capture_on_commit_callbacks(execute=True):
+            version = PollVersionFactory(
+                state=constants.DRAFT, content__poll=source_version.content.poll, source=source_version
+            )
+            new_source_version = PollVersionFactory(state=constants.DRAFT)
+            new_version = PollVersionFactory(
+                state=constants.DRAFT, content__poll=new_source_version.content.poll, source=new_source_version
+            )
+
+        self.assertEqual(version.contentexpiry.expires, source_expiry_date)
+        self.assertEqual(new_version.contentexpiry.expires, new_source_version.contentexpiry.expires)
+
+    def test_content_expiry_collected_after_rollback(self):
+        """
+        Drafts created in a transaction that is rolled back are discarded, and drafts
+        created afterwards are still collected
+        """
+        with capture_on_commit_callbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    PollVersionFactory(state=constants.DRAFT)
+                    raise ValueError
+            except ValueError:
+                pass
+
+            version = PollVersionFactory(state=constants.DRAFT)
+
+        self.assertEqual(ContentExpiry.objects.get().version, version)
+
+
+class ContentExpiryBatchCreationTestCase(CMSTestCase):
+    def test_content_expiry_created_when_batch_exits(self):
+        """
+        The content expiry records for the drafts created in a batch are created when it exits
+        """
+        source_expiry_date = timezone.now() + datetime.timedelta(days=5)
+        source_version = PollVersionFactory(state=constants.DRAFT)
+        ContentExpiry.objects.filter(version=source_version).update(expires=source_expiry_date)
+
+        with batch_content_expiry():
+            from_source_version = PollVersionFactory(
+                state=constants.DRAFT, content__poll=source_version.content.poll, source=source_version
+            )
+            versions = PollVersionFactory.create_batch(3, state=constants.DRAFT)
+
+            self.assertFalse(ContentExpiry.objects.filter(version__in=versions).exists())
+
+        self.assertEqual(from_source_version.contentexpiry.expires, source_expiry_date)
+        for version in versions:
+            self.assertEqual(version.contentexpiry.expires, get_future_expire_date(version, version.created))
+
+    def test_content_expiry_batch_queries(self):
+        """
+        The number of queries made when the batch exits doesn't depend on the number of drafts
+        """
+        batch = batch_content_expiry()
+        batch.__enter__()
+        PollVersionFactory.create_batch(5, state=constants.DRAFT)
+
+        # The versions, the source version expiry records and the insert
+        with self.assertNumQueries(3):
+            batch.__exit__(None, None, None)
+
+        self.assertEqual(ContentExpiry.objects.count(), 5)
+
+    def test_content_expiry_nested_batch(self):
+        """
+        A nested batch is created when the outermost batch exits
+        """
+        with batch_content_expiry():
+            with batch_content_expiry():
+                version = PollVersionFactory(state=constants.DRAFT)
+
+            self.assertFalse(ContentExpiry.objects.filter(version=version).exists())
+
+        self.assertTrue(ContentExpiry.objects.filter(version=version).exists())
+
+    def test_content_expiry_batch_exception(self):
+        """
+        Nothing is created when a batch exits with an exception, and drafts created
+        afterwards have their records created as usual
+        """
+        with self.assertRaises(ValueError):
+            with batch_content_expiry():
+                PollVersionFactory(state=constants.DRAFT)
+                raise ValueError
+
+        version = PollVersionFactory(state=constants.DRAFT)
+
+        self.assertEqual(ContentExpiry.objects.get().version, version)
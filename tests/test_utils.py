@@ -1,19 +1,49 @@
 from unittest.mock import patch
 
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+
+from cms.api import create_page
+from cms.models import PageContent
 from cms.test_utils.testcases import CMSTestCase
 
 from dateutil.relativedelta import relativedelta
+from djangocms_versioning.constants import ARCHIVED, DRAFT, PUBLISHED
 from freezegun import freeze_time
 
+from djangocms_content_expiry.cache import invalidate_default_duration_cache
+from djangocms_content_expiry.models import ContentExpiry
 from djangocms_content_expiry.test_utils.factories import (
     DefaultContentExpiryConfigurationFactory,
 )
 from djangocms_content_expiry.test_utils.polls.factories import PollContentExpiryFactory
-from djangocms_content_expiry.utils import get_default_duration_for_version
+from djangocms_content_expiry.test_utils.polls.models import PollContent
+from djangocms_content_expiry.test_utils.polymorphic_project.factories import (
+    ArtProjectContentExpiryFactory,
+)
+from djangocms_content_expiry.test_utils.utils import capture_on_commit_callbacks
+from djangocms_content_expiry.utils import (
+    get_content_expiry_preview_url,
+    get_content_type_predicate,
+    get_default_duration_for_version,
+    get_future_expire_date,
+    get_future_expire_dates,
+    get_version_content,
+    get_versionable_content_models,
+    get_versionable_content_types,
+    prefetch_preview_urls,
+    prefetch_version_content,
+)
 
 
 class ContentExpiryDefaultConfigurationHelperTestCase(CMSTestCase):
 
+    def setUp(self):
+        # The durations loaded during the test are rolled back without a commit to reload them
+        self.addCleanup(invalidate_default_duration_cache)
+
     @freeze_time("2200-01-14")
     @patch('djangocms_content_expiry.utils.DEFAULT_CONTENT_EXPIRY_DURATION', 1)
     def test_default_duration_for_content_type(self):
@@ -32,10 +62,11 @@ class ContentExpiryDefaultConfigurationHelperTestCase(CMSTestCase):
         self.assertEqual(no_default_actual_result, no_default_expected_result)
 
         # After creating an entry the expected value should be the value set here...
-        DefaultContentExpiryConfigurationFactory(
-            content_type=poll_content_expiry.version.content_type,
-            duration=3
-        )
+        with capture_on_commit_callbacks(execute=True):
+            DefaultContentExpiryConfigurationFactory(
+                content_type=poll_content_expiry.version.content_type,
+                duration=3
+            )
 
         has_default_duration = 3
         has_default_actual_result = get_default_duration_for_version(poll_content_expiry.version)
@@ -44,3 +75,204 @@ class ContentExpiryDefaultConfigurationHelperTestCase(CMSTestCase):
         # Ensure a fair test by enforcing that the values set have to be different
         self.assertNotEqual(no_default_duration, has_default_duration)
         self.assertEqual(has_default_actual_result, has_default_expected_result)
+
+    @patch('djangocms_content_expiry.utils.DEFAULT_CONTENT_EXPIRY_DURATION', 1)
+    def test_future_expire_dates_for_many_versions(self):
+        """
+        The expiry dates computed for many versions at once match the dates for each version
+        """
+        poll_content_expiries = PollContentExpiryFactory.create_batch(3)
+        project_content_expiries = ArtProjectContentExpiryFactory.create_batch(3)
+        versions = [content_expiry.version for content_expiry in poll_content_expiries + project_content_expiries]
+        DefaultContentExpiryConfigurationFactory(content_type=versions[0].content_type, duration=3)
+        expected_dates = [get_future_expire_date(version, version.modified) for version in versions]
+
+        with self.assertNumQueries(0):
+            expiry_dates = get_future_expire_dates((version, version.modified) for version in versions)
+
+        self.assertEqual(expiry_dates, expected_dates)
+        self.assertEqual(expiry_dates[0], versions[0].modified + relativedelta(months=3))
+        self.assertEqual(expiry_dates[-1], versions[-1].modified + relativedelta(months=1))
+
+    def test_default_duration_steady_state_has_no_queries(self):
+        """
+        Once the durations are loaded an expiry date is computed without a query
+        """
+        poll_content_expiry = PollContentExpiryFactory()
+        version = poll_content_expiry.version
+        get_default_duration_for_version(version)
+
+        with self.assertNumQueries(0):
+            get_future_expire_date(version, version.created)
+
+    @patch('djangocms_content_expiry.utils.DEFAULT_CONTENT_EXPIRY_DURATION', 1)
+    def test_default_duration_reloaded_when_version_changes(self):
+        """
+        A change to the configuration version made by another process reloads the durations
+        """
+        poll_content_expiry = PollContentExpiryFactory()
+        version = poll_content_expiry.version
+        get_default_duration_for_version(version)
+
+        with capture_on_commit_callbacks() as callbacks:
+            configuration = DefaultContentExpiryConfigurationFactory(content_type=version.content_type, duration=3)
+
+        # The durations are only reloaded once the change is committed
+        self.assertEqual(get_default_duration_for_version(version), relativedelta(months=1))
+
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(get_default_duration_for_version(version), relativedelta(months=3))
+
+        # An update doesn't send a signal, the same as a change made in another process
+        type(configuration).objects.filter(pk=configuration.pk).update(duration=5)
+
+        self.assertEqual(get_default_duration_for_version(version), relativedelta(months=3))
+
+        invalidate_default_duration_cache()
+
+        self.assertEqual(get_default_duration_for_version(version), relativedelta(months=5))
+
+        with capture_on_commit_callbacks(execute=True):
+            configuration.delete()
+
+        self.assertEqual(get_default_duration_for_version(version), relativedelta(months=1))
+
+
+class PrefetchVersionContentTestCase(CMSTestCase):
+    def test_content_resolved_with_a_query_per_content_type(self):
+        """
+        The content objects of every version are resolved with a query per content type
+        and are then available without querying the database again.
+        """
+        poll_expiry_list = PollContentExpiryFactory.create_batch(3, version__state=DRAFT)
+        art_expiry_list = [
+            ArtProjectContentExpiryFactory(version__state=PUBLISHED),
+            ArtProjectContentExpiryFactory(version__state=ARCHIVED),
+        ]
+        content_expiry_list = list(
+            ContentExpiry.objects.select_related("version").order_by("pk")
+        )
+
+        # Polymorphic content requires an additional query to resolve the child models
+        with self.assertNumQueries(3):
+            prefetch_version_content(content_expiry_list)
+
+        with self.assertNumQueries(0):
+            content_list = [get_version_content(content_expiry.version) for content_expiry in content_expiry_list]
+
+        self.assertEqual(
+            content_list,
+            [content_expiry.version.content for content_expiry in poll_expiry_list + art_expiry_list],
+        )
+
+
+class VersionableContentTypesTestCase(CMSTestCase):
+    def test_versionable_content_models_are_only_collected_once(self):
+        """
+        The versionable registry is only read the first time the content models are needed
+        """
+        content_models = get_versionable_content_models()
+
+        with patch("djangocms_content_expiry.utils.apps.get_app_config") as mock_get_app_config:
+            self.assertEqual(get_versionable_content_models(), content_models)
+
+        mock_get_app_config.assert_not_called()
+
+    def test_versionable_content_types_are_unique_and_cached(self):
+        """
+        Each versionable content type is listed once, and no queries are run once the
+        content types are cached
+        """
+        content_types = get_versionable_content_types()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_versionable_content_types(), content_types)
+
+        self.assertEqual(len({content_type.pk for content_type in content_types}), len(content_types))
+        self.assertEqual(
+            [content_type.model_class() for content_type in content_types],
+            list(get_versionable_content_models()),
+        )
+
+
+class PrefetchPreviewUrlsTestCase(CMSTestCase):
+    def _create_page_content_expiry(self, title, publish=True):
+        page = create_page(title=title, template="page.html", language="en", created_by=self.superuser)
+        version = PageContent._base_manager.get(page=page, language="en").versions.first()
+        if publish:
+            version.publish(self.superuser)
+        return version.contentexpiry
+
+    def _get_content_expiry_list(self):
+        return list(ContentExpiry.objects.select_related("version").order_by("pk"))
+
+    def setUp(self):
+        self.superuser = self.get_superuser()
+
+    def test_page_content_preview_urls_are_resolved_together(self):
+        """
+        The preview urls of PageContent objects are resolved with the same number of queries
+        however many PageContent objects there are, and match the urls found for each record
+        """
+        self._create_page_content_expiry("Draft page", publish=False)
+        self._create_page_content_expiry("Published page")
+        # Warm up any caches before measuring
+        prefetch_preview_urls(self._get_content_expiry_list())
+
+        content_expiry_list = self._get_content_expiry_list()
+        with CaptureQueriesContext(connection) as initial_queries:
+            prefetch_preview_urls(content_expiry_list)
+
+        for index in range(3):
+            self._create_page_content_expiry(f"Published page {index}")
+        self._create_page_content_expiry("Another draft page", publish=False)
+
+        content_expiry_list = self._get_content_expiry_list()
+        with CaptureQueriesContext(connection) as queries:
+            prefetch_preview_urls(content_expiry_list)
+
+        with self.assertNumQueries(0):
+            preview_urls = [
+                get_content_expiry_preview_url(content_expiry) for content_expiry in content_expiry_list
+            ]
+
+        self.assertEqual(len(queries), len(initial_queries))
+        self.assertEqual(
+            preview_urls,
+            [
+                get_content_expiry_preview_url(content_expiry)
+                for content_expiry in self._get_content_expiry_list()
+            ],
+        )
+
+
+class ContentTypePredicateTestCase(CMSTestCase):
+    def test_no_predicates(self):
+        self.assertIsNone(get_content_type_predicate({}, None))
+
+    def test_predicates_are_merged_into_one_q_object(self):
+        """
+        Each predicate only applies to the records of its content model, and the records of
+        every other content model are kept
+        """
+        poll_content_type = ContentType.objects.get_for_model(PollContent)
+        page_content_type = ContentType.objects.get_for_model(PageContent)
+        requests = []
+
+        def poll_predicate(request):
+            requests.append(request)
+            return Q(object_id=1)
+
+        predicate = get_content_type_predicate(
+            {PollContent: poll_predicate, PageContent: lambda request: Q(object_id=2)}, "request"
+        )
+
+        self.assertEqual(requests, ["request"])
+        self.assertEqual(
+            predicate,
+            ~Q(content_type__in=[poll_content_type, page_content_type])
+            | Q(content_type=poll_content_type) & Q(object_id=1)
+            | Q(content_type=page_content_type) & Q(object_id=2),
+        )